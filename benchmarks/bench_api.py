@@ -0,0 +1,168 @@
+# Whole-API load test: realistic request mix against main:app, in-process or over HTTP.
+#
+# Seeding goes through the API itself (register --users, then --tasks spread over them with POST /tasks/bulk),
+# so the same run works against any database the app is pointed at. Then --vus virtual users each take
+# one seeded account and, for --seconds, pick operations at random by --mix weight:
+#   login     POST /auth/login (password verify)       list      GET /tasks/?limit=20
+#   create    POST /tasks/                             update    POST /tasks/{id}
+#   complete  POST /tasks/{id}/complete                delete    DELETE /tasks/{id}
+# update/complete/delete use tasks the virtual user knows about, falling back to create when it has none.
+# Reported as JSON: throughput plus p50/p95/p99 per operation and overall (see common.summarize).
+#
+#   in-process, fresh SQLite file (httpx ASGI transport, app lifespan included):
+#     uv run python benchmarks/bench_api.py --users 50 --tasks 20000 --vus 50 --seconds 30
+#   in-process against another database:
+#     uv run python benchmarks/bench_api.py --database-url postgresql://user:pw@localhost/bench
+#   over HTTP against a running server (e.g. `python serve.py --workers 4`):
+#     uv run python benchmarks/bench_api.py --base-url http://127.0.0.1:8000 --output result.json
+# Use --seed for a reproducible operation sequence.
+import argparse
+import asyncio
+import random
+import time
+import uuid
+
+from common import emit, import_main, summarize, temp_sqlite_url
+
+DEFAULT_MIX = "login=5,list=40,create=20,update=15,complete=10,delete=10"
+PASSWORD = "Benchmark-pass1"
+
+
+def parse_mix(value: str) -> dict:
+    mix = {}
+    for part in value.split(","):
+        name, _, weight = part.partition("=")
+        mix[name.strip()] = float(weight)
+    unknown = set(mix) - set(OPERATIONS)
+    if unknown:
+        raise argparse.ArgumentTypeError(f"unknown operations: {', '.join(sorted(unknown))}")
+    return mix
+
+
+class VirtualUser:
+    def __init__(self, client, username: str, task_ids: list, rng: random.Random):
+        self.client = client
+        self.username = username
+        self.task_ids = task_ids
+        self.rng = rng
+        self.headers = {}
+
+    async def login(self) -> bool:
+        response = await self.client.post("/auth/login", data={"username": self.username, "password": PASSWORD})
+        if response.status_code == 200:
+            self.headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+        return response.status_code == 200
+
+    async def list(self) -> bool:
+        return (await self.client.get("/tasks/", params={"limit": 20}, headers=self.headers)).status_code == 200
+
+    async def create(self) -> bool:
+        response = await self.client.post("/tasks/", json={"title": f"load test {self.rng.random():.6f}", "priority": "high"}, headers=self.headers)
+        if response.status_code == 201:
+            self.task_ids.append(response.json()["id"])
+        return response.status_code == 201
+
+    async def update(self) -> bool:
+        if not self.task_ids:
+            return await self.create()
+        task_id = self.rng.choice(self.task_ids)
+        return (await self.client.post(f"/tasks/{task_id}", json={"title": f"updated {self.rng.random():.6f}"}, headers=self.headers)).status_code == 200
+
+    async def complete(self) -> bool:
+        if not self.task_ids:
+            return await self.create()
+        return (await self.client.post(f"/tasks/{self.rng.choice(self.task_ids)}/complete", headers=self.headers)).status_code == 200
+
+    async def delete(self) -> bool:
+        if not self.task_ids:
+            return await self.create()
+        task_id = self.task_ids.pop(self.rng.randrange(len(self.task_ids)))
+        return (await self.client.delete(f"/tasks/{task_id}", headers=self.headers)).status_code == 204
+
+
+OPERATIONS = ["login", "list", "create", "update", "complete", "delete"]
+
+
+async def seed(client, users: int, tasks: int) -> list:
+    # returns [(username, [task ids])]; usernames are unique per run so a shared database can be reused
+    run = uuid.uuid4().hex[:8]
+    accounts = []
+    for u in range(users):
+        username = f"load_{run}_{u}"
+        response = await client.post("/auth/register", json={"email": f"{username}@example.com", "username": username, "password": PASSWORD})
+        response.raise_for_status()
+        accounts.append((username, []))
+    per_user = [tasks // users + (1 if u < tasks % users else 0) for u in range(users)]
+    for (username, task_ids), count in zip(accounts, per_user):
+        token = (await client.post("/auth/login", data={"username": username, "password": PASSWORD})).json()["access_token"]
+        for start in range(0, count, 1000):
+            batch = [{"title": f"seed {i}", "description": "load test seed task"} for i in range(start, min(count, start + 1000))]
+            response = await client.post("/tasks/bulk", json=batch, headers={"Authorization": f"Bearer {token}"})
+            response.raise_for_status()
+            task_ids.extend(task["id"] for task in response.json())
+    return accounts
+
+
+async def drive(client, accounts: list, args) -> dict:
+    rng = random.Random(args.seed)
+    names, weights = zip(*args.mix.items())
+    latencies = {name: [] for name in names}
+    errors = {name: 0 for name in names}
+    users = [VirtualUser(client, *accounts[v % len(accounts)], random.Random(rng.random())) for v in range(args.vus)]
+    for user in users:
+        await user.login()
+
+    async def run_user(user: VirtualUser, deadline: float):
+        while time.perf_counter() < deadline:
+            name = user.rng.choices(names, weights)[0]
+            started = time.perf_counter()
+            try:
+                ok = await getattr(user, name)()
+            except Exception:
+                ok = False
+            latencies[name].append(time.perf_counter() - started)
+            errors[name] += 0 if ok else 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(run_user(user, started + args.seconds) for user in users))
+    elapsed = time.perf_counter() - started
+    return {
+        "overall": summarize([latency for values in latencies.values() for latency in values], elapsed, sum(errors.values())),
+        "operations": {name: summarize(latencies[name], elapsed, errors[name]) for name in names},
+    }
+
+
+async def amain(args) -> dict:
+    import httpx
+
+    limits = httpx.Limits(max_connections=args.vus + 10, max_keepalive_connections=args.vus + 10)
+    if args.base_url:
+        async with httpx.AsyncClient(base_url=args.base_url, limits=limits, timeout=60.0) as client:
+            accounts = await seed(client, args.users, args.tasks)
+            result = await drive(client, accounts, args)
+        target = args.base_url
+    else:
+        main = import_main(args.database_url or temp_sqlite_url("loadtest.db"))
+        # ASGITransport does not send lifespan events, so run startup/shutdown (schema, hasher) ourselves
+        async with main.app.router.lifespan_context(main.app):
+            transport = httpx.ASGITransport(app=main.app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://loadtest", limits=limits, timeout=60.0) as client:
+                accounts = await seed(client, args.users, args.tasks)
+                result = await drive(client, accounts, args)
+        target = main.ASYNC_DATABASE_URL
+    return {"config": {**vars(args), "target": target}, **result}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=20, help="accounts to register")
+    parser.add_argument("--tasks", type=int, default=5000, help="tasks seeded across the accounts")
+    parser.add_argument("--vus", type=int, default=20, help="concurrent virtual users")
+    parser.add_argument("--seconds", type=float, default=20.0)
+    parser.add_argument("--mix", type=parse_mix, default=DEFAULT_MIX, help=f"operation weights, default {DEFAULT_MIX}")
+    parser.add_argument("--seed", type=int, default=None, help="random seed for a reproducible operation sequence")
+    parser.add_argument("--base-url", default=None, help="drive a running server over HTTP instead of in-process")
+    parser.add_argument("--database-url", default=None, help="in-process only, default: a fresh SQLite file")
+    parser.add_argument("--output", default=None, help="also write the JSON result here")
+    args = parser.parse_args()
+    emit(asyncio.run(amain(args)), args.output)
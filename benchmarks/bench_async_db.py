@@ -0,0 +1,93 @@
+# Sync vs async data layer: requests/sec at high client concurrency.
+#
+# Both apps serve the same task-page query against the same seeded database:
+#   sync  - `def` handler + sqlalchemy Session (runs in Starlette's threadpool, like the old main.py)
+#   async - `async def` handler + main.SessionLocal (AsyncSession, what main.py uses now)
+# Requests go through httpx's in-process ASGI transport so the numbers measure the app, not the network.
+#
+#   uv run python benchmarks/bench_async_db.py --clients 500 --requests 20000
+#   uv run python benchmarks/bench_async_db.py --database-url postgresql://user:pw@localhost/bench
+# (a Postgres run needs both asyncpg and a sync driver such as psycopg2 installed)
+import argparse
+import asyncio
+import random
+
+from common import emit, import_main, run_load, temp_sqlite_url
+
+
+def build_apps(main):
+    from fastapi import Depends, FastAPI
+    from sqlalchemy import create_engine, select
+    from sqlalchemy.orm import sessionmaker
+
+    def page_query(owner_id: int, limit: int):
+        return select(main.Task).where(main.Task.owner_id == owner_id).order_by(main.Task.created_at.desc(), main.Task.id.desc()).limit(limit)
+
+    sync_engine = create_engine(main.DATABASE_URL, connect_args={"check_same_thread": False} if "sqlite" in main.DATABASE_URL else {})
+    SyncSession = sessionmaker(bind=sync_engine, autoflush=False)
+
+    sync_app = FastAPI()
+
+    # the session is opened inside the handler rather than through a `yield` dependency: with 500 clients
+    # the dependency teardown queues behind threadpool workers that are themselves waiting on the pool (deadlock)
+    @sync_app.get("/tasks/", response_model=list[main.TaskResponse])
+    def sync_tasks(owner_id: int, limit: int = 20):
+        with SyncSession() as db:
+            return db.scalars(page_query(owner_id, limit)).all()
+
+    async_app = FastAPI()
+
+    @async_app.get("/tasks/", response_model=list[main.TaskResponse])
+    async def async_tasks(owner_id: int, limit: int = 20, db=Depends(main.get_db)):
+        return (await db.scalars(page_query(owner_id, limit))).all()
+
+    return sync_app, async_app, sync_engine
+
+
+async def seed(main, users: int, tasks_per_user: int) -> None:
+    async with main.engine.begin() as conn:
+        await conn.run_sync(main.Base.metadata.drop_all)
+        await conn.run_sync(main.create_schema)
+    async with main.SessionLocal() as db:
+        for u in range(users):
+            user = main.User(email=f"bench{u}@example.com", username=f"bench{u}", hashed_password="x")
+            db.add(user)
+            await db.flush()
+            db.add_all(main.Task(title=f"task {i}", description="benchmark task", owner_id=user.id) for i in range(tasks_per_user))
+        await db.commit()
+
+
+async def bench(app, args) -> dict:
+    import httpx
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+        async def send():
+            params = {"owner_id": random.randint(1, args.users), "limit": args.page_size}
+            return (await client.get("/tasks/", params=params)).status_code == 200
+
+        await run_load(send, clients=min(args.clients, 50), total=200)  # warm-up: pools, caches
+        return await run_load(send, clients=args.clients, total=args.requests)
+
+
+async def amain(args) -> dict:
+    main = import_main(args.database_url or temp_sqlite_url())
+    await seed(main, args.users, args.tasks)
+    sync_app, async_app, sync_engine = build_apps(main)
+    results = {"config": vars(args), "sync": await bench(sync_app, args), "async": await bench(async_app, args)}
+    results["async_vs_sync_rps"] = round(results["async"]["rps"] / results["sync"]["rps"], 2) if results["sync"]["rps"] else None
+    sync_engine.dispose()
+    await main.engine.dispose()
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--clients", type=int, default=500, help="concurrent clients")
+    parser.add_argument("--requests", type=int, default=10000, help="requests per app")
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--tasks", type=int, default=500, help="tasks per user")
+    parser.add_argument("--page-size", type=int, default=20)
+    parser.add_argument("--database-url", default=None, help="defaults to a temporary SQLite file")
+    parser.add_argument("--output", default=None, help="also write the JSON result here")
+    args = parser.parse_args()
+    emit(asyncio.run(amain(args)), args.output)
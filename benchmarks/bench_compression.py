@@ -0,0 +1,63 @@
+# Response compression: CPU cost vs bytes saved for TaskListResponse pages of 10 / 100 / 1000 tasks.
+#
+# For each page size the JSON body is built the way GET /tasks/ builds it (main.to_json). Then for every
+# encoding main.COMPRESSORS provides (gzip always; br and zstd when brotli / zstandard are
+# installed) and a few levels of each, the script reports:
+#   bytes, ratio      compressed size and original / compressed
+#   compress_us       CPU time per response
+#   us_per_kb_saved   CPU time per KiB of bandwidth saved, the number to compare levels by
+# plus cache_hit_us: what main.compress_body costs for a response whose ETag is already in the precompressed cache.
+#
+#   uv run --extra compression python benchmarks/bench_compression.py --sizes 10 100 1000
+import argparse
+
+from bench_serialization import make_tasks, per_call_us
+from common import emit, import_main, temp_sqlite_url
+
+LEVELS = {"gzip": [1, 6, 9], "br": [1, 4, 6], "zstd": [1, 3, 9]}
+LEVEL_SETTINGS = {"gzip": "GZIP_LEVEL", "br": "BROTLI_QUALITY", "zstd": "ZSTD_LEVEL"}
+
+
+def measure(main, encoding: str, level: int, body: bytes, seconds: float) -> dict:
+    setattr(main, LEVEL_SETTINGS[encoding], level)
+
+    def compress():
+        compressor = main.COMPRESSORS[encoding]()
+        return compressor.compress(body) + compressor.finish()
+
+    compressed = compress()
+    compress_us = per_call_us(compress, seconds)
+    saved_kb = (len(body) - len(compressed)) / 1024
+    return {
+        "bytes": len(compressed),
+        "ratio": round(len(body) / len(compressed), 2),
+        "compress_us": compress_us,
+        "us_per_kb_saved": round(compress_us / saved_kb, 2) if saved_kb > 0 else None,
+    }
+
+
+def main_(args) -> dict:
+    main = import_main(temp_sqlite_url())
+    defaults = {name: getattr(main, setting) for name, setting in LEVEL_SETTINGS.items()}
+    results = {}
+    for size in args.sizes:
+        page = main.TaskListResponse(tasks=make_tasks(main, size), total=size, skip=0, limit=size)
+        body = main.to_json(page)
+        result = {"identity_bytes": len(body), "min_size_skipped": len(body) < main.COMPRESSION_MIN_SIZE}
+        for encoding in main.COMPRESSORS:
+            result[encoding] = {f"level_{level}": measure(main, encoding, level, body, args.seconds) for level in LEVELS[encoding]}
+            setattr(main, LEVEL_SETTINGS[encoding], defaults[encoding])
+        cache_key = ("/tasks/", f"limit={size}".encode(), f'"page-{size}"')
+        main.compress_body("gzip", body, cache_key)  # warm the cache
+        result["cache_hit_us"] = per_call_us(lambda: main.compress_body("gzip", body, cache_key), args.seconds)
+        results[f"page_{size}"] = result
+    return {"config": vars(args), "encodings": list(main.COMPRESSORS), "default_levels": defaults, "results": results}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--seconds", type=float, default=0.5, help="minimum measuring time per case")
+    parser.add_argument("--output", default=None, help="also write the JSON result here")
+    args = parser.parse_args()
+    emit(main_(args), args.output)
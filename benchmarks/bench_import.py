@@ -0,0 +1,89 @@
+# POST /tasks/import throughput (rows/sec) against a local SQLite file, per chunk size.
+#
+# The body is generated on the fly and uploaded as a streamed request through httpx's in-process
+# ASGI transport, so the run also shows that the endpoint keeps pace with an incremental body.
+# Each chunk size imports the same --rows into a fresh user; the committed count is checked afterwards.
+#
+#   uv run python benchmarks/bench_import.py --rows 100000 --chunk-sizes 100,500,2000 --format csv
+import argparse
+import asyncio
+import json
+import time
+
+from common import emit, import_main, temp_sqlite_url
+
+
+def body_lines(rows: int, fmt: str):
+    if fmt == "csv":
+        yield b"title,description,priority\n"
+    for i in range(rows):
+        if fmt == "csv":
+            yield f"imported task {i},row {i} of the benchmark import,high\n".encode()
+        else:
+            yield json.dumps({"title": f"imported task {i}", "description": f"row {i} of the benchmark import", "priority": "high"}).encode() + b"\n"
+
+
+async def stream_body(rows: int, fmt: str, upload_chunk: int = 64 * 1024):
+    # group lines into ~64 KiB request chunks, like a client streaming a file
+    buffer = bytearray()
+    for line in body_lines(rows, fmt):
+        buffer += line
+        if len(buffer) >= upload_chunk:
+            yield bytes(buffer)
+            buffer.clear()
+    if buffer:
+        yield bytes(buffer)
+
+
+async def import_once(main, client, chunk_size: int, args) -> dict:
+    from sqlalchemy import func, select
+
+    username = f"import{chunk_size}"
+    async with main.SessionLocal() as db:
+        user = await main.create_user(db, f"{username}@example.com", username, "x")
+    headers = {"Authorization": f"Bearer {main.create_access_token({'sub': username})}"}
+
+    started = time.perf_counter()
+    response = await client.post(
+        "/tasks/import", params={"format": args.format, "chunk_size": chunk_size}, content=stream_body(args.rows, args.format), headers=headers
+    )
+    elapsed = time.perf_counter() - started
+    report = response.json()
+
+    async with main.SessionLocal() as db:
+        stored = await db.scalar(select(func.count()).select_from(main.Task).where(main.Task.owner_id == user.id))
+    return {
+        "status": response.status_code,
+        "imported": report.get("imported"),
+        "failed": report.get("failed"),
+        "batches": report.get("batches"),
+        "stored": stored,
+        "elapsed_s": round(elapsed, 3),
+        "rows_per_s": round(args.rows / elapsed, 1),
+    }
+
+
+async def amain(args) -> dict:
+    import httpx
+
+    main = import_main(temp_sqlite_url())
+    async with main.engine.begin() as conn:
+        await conn.run_sync(main.create_schema)
+
+    results = {}
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        for chunk_size in args.chunk_sizes:
+            results[f"chunk_{chunk_size}"] = await import_once(main, client, chunk_size, args)
+    await main.engine.dispose()
+    return {"config": {**vars(args), "database": main.ASYNC_DATABASE_URL}, "results": results}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--chunk-sizes", type=lambda value: [int(n) for n in value.split(",")], default=[100, 500, 2000])
+    parser.add_argument("--format", choices=["ndjson", "csv"], default="ndjson")
+    parser.add_argument("--output", default=None, help="also write the JSON result here")
+    args = parser.parse_args()
+    emit(asyncio.run(amain(args)), args.output)
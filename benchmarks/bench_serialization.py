@@ -0,0 +1,104 @@
+# Response serialization cost for TaskListResponse pages of 10 / 100 / 1000 tasks (no database).
+#
+# encode  - the serialization step only, from in-memory Task ORM objects to JSON bytes:
+#             stdlib:        validate -> revalidate -> python dicts -> json.dumps (FastAPI's classic path)
+#             json_response: validate once -> pydantic-core to_json (main.json_response)
+# endpoint - the same page served through FastAPI + httpx ASGI transport:
+#             response_model: handler returns the model, FastAPI validates/serializes it again
+#             json_response:  handler returns main.json_response(model)
+#
+#   uv run python benchmarks/bench_serialization.py --sizes 10 100 1000
+import argparse
+import asyncio
+import json
+import time
+from datetime import datetime, timedelta
+
+from common import emit, import_main, temp_sqlite_url
+
+
+def make_tasks(main, n: int) -> list:
+    now = datetime(2026, 1, 1)
+    return [
+        main.Task(
+            id=i, title=f"Task number {i}", description="Lorem ipsum dolor sit amet, " * 8, is_completed=i % 3 == 0,
+            due_date=now + timedelta(days=i) if i % 2 else None, created_at=now, updated_at=now, owner_id=1,
+            status=main.TaskStatus.TODO, priority=main.TaskPriority.MEDIUM,
+        )
+        for i in range(n)
+    ]
+
+
+def per_call_us(fn, min_seconds: float) -> float:
+    calls, started = 0, time.perf_counter()
+    while True:
+        fn()
+        calls += 1
+        elapsed = time.perf_counter() - started
+        if elapsed >= min_seconds:
+            return round(elapsed / calls * 1e6, 1)
+
+
+def bench_encode(main, tasks: list, min_seconds: float) -> dict:
+    from pydantic import TypeAdapter
+
+    adapter = TypeAdapter(main.TaskListResponse)
+
+    def stdlib():
+        model = main.TaskListResponse(tasks=tasks, total=len(tasks), skip=0, limit=len(tasks))
+        model = adapter.validate_python(model, from_attributes=True)
+        return json.dumps(adapter.dump_python(model, mode="json")).encode()
+
+    def fast():
+        return main.json_response(main.TaskListResponse(tasks=tasks, total=len(tasks), skip=0, limit=len(tasks))).body
+
+    assert json.loads(stdlib()) == json.loads(fast())
+    return {"stdlib_us": per_call_us(stdlib, min_seconds), "json_response_us": per_call_us(fast, min_seconds)}
+
+
+async def bench_endpoint(main, tasks: list, min_seconds: float) -> dict:
+    import httpx
+    from fastapi import FastAPI
+
+    app = FastAPI()
+
+    @app.get("/model", response_model=main.TaskListResponse)
+    async def as_model():
+        return main.TaskListResponse(tasks=tasks, total=len(tasks), skip=0, limit=len(tasks))
+
+    @app.get("/fast", response_model=main.TaskListResponse)
+    async def as_json_response():
+        return main.json_response(main.TaskListResponse(tasks=tasks, total=len(tasks), skip=0, limit=len(tasks)))
+
+    results = {}
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+        for name, path in (("response_model_us", "/model"), ("json_response_us", "/fast")):
+            calls, started = 0, time.perf_counter()
+            while time.perf_counter() - started < min_seconds:
+                (await client.get(path)).raise_for_status()
+                calls += 1
+            results[name] = round((time.perf_counter() - started) / calls * 1e6, 1)
+    return results
+
+
+def main_(args) -> dict:
+    main = import_main(temp_sqlite_url())
+    results = {"config": vars(args)}
+    for size in args.sizes:
+        tasks = make_tasks(main, size)
+        encode = bench_encode(main, tasks, args.seconds)
+        endpoint = asyncio.run(bench_endpoint(main, tasks, args.seconds))
+        results[f"page_{size}"] = {
+            "encode": {**encode, "speedup": round(encode["stdlib_us"] / encode["json_response_us"], 2)},
+            "endpoint": {**endpoint, "speedup": round(endpoint["response_model_us"] / endpoint["json_response_us"], 2)},
+        }
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--seconds", type=float, default=1.0, help="minimum measuring time per case")
+    parser.add_argument("--output", default=None, help="also write the JSON result here")
+    args = parser.parse_args()
+    emit(main_(args), args.output)
@@ -0,0 +1,133 @@
+# Requests/sec of the production launcher (serve.py) from 1 to N worker processes.
+#
+# For each worker count the script starts `python serve.py --workers K` on a local port, sharing one
+# seeded SQLite database across runs. It then drives GET /tasks/?limit=20 (authenticated) over real
+# HTTP from --load-procs load-generator processes, each running --clients connections for --seconds.
+# Reported per worker count: the usual latency summary plus scaling = rps / rps with 1 worker.
+# The load generators share the machine with the server, so keep --load-procs well below the CPU
+# count or they become the bottleneck; scaling flattens out at the number of free cores.
+#
+#   uv run --extra server python benchmarks/bench_server_scaling.py --max-workers 8 --clients 64 --seconds 15
+import argparse
+import asyncio
+import multiprocessing
+import os
+import subprocess
+import sys
+import time
+
+from common import REPO_ROOT, emit, summarize, temp_sqlite_url
+
+
+def worker_counts(max_workers: int) -> list:
+    counts, k = [], 1
+    while k < max_workers:
+        counts.append(k)
+        k *= 2
+    return counts + [max_workers]
+
+
+def wait_until_up(base_url: str, server: subprocess.Popen, timeout: float = 60.0) -> None:
+    import httpx
+
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError(f"serve.py exited with {server.returncode}")
+        try:
+            if httpx.get(f"{base_url}/health", timeout=1.0).status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError("serve.py did not come up in time")
+
+
+def seed(base_url: str, tasks: int) -> str:
+    import httpx
+
+    user = {"email": "scaling@example.com", "username": "scaling", "password": "Benchmark-pass1"}
+    with httpx.Client(base_url=base_url, timeout=30.0) as client:
+        if client.post("/auth/register", json=user).status_code == 201:
+            for start in range(0, tasks, 500):
+                token = client.post("/auth/login", data={"username": user["username"], "password": user["password"]}).json()["access_token"]
+                batch = [{"title": f"task {i}", "description": "scaling benchmark task"} for i in range(start, min(tasks, start + 500))]
+                client.post("/tasks/bulk", json=batch, headers={"Authorization": f"Bearer {token}"}).raise_for_status()
+        return client.post("/auth/login", data={"username": user["username"], "password": user["password"]}).json()["access_token"]
+
+
+def load_process(base_url: str, path: str, token: str, clients: int, seconds: float, queue) -> None:
+    import httpx
+
+    async def run():
+        latencies, errors = [], 0
+        deadline = time.perf_counter() + seconds
+        limits = httpx.Limits(max_connections=clients, max_keepalive_connections=clients)
+        async with httpx.AsyncClient(base_url=base_url, headers={"Authorization": f"Bearer {token}"}, limits=limits, timeout=30.0) as client:
+
+            async def worker():
+                nonlocal errors
+                while time.perf_counter() < deadline:
+                    started = time.perf_counter()
+                    try:
+                        ok = (await client.get(path)).status_code == 200
+                    except httpx.HTTPError:
+                        ok = False
+                    latencies.append(time.perf_counter() - started)
+                    errors += 0 if ok else 1
+
+            await asyncio.gather(*(worker() for _ in range(clients)))
+        return latencies, errors
+
+    queue.put(asyncio.run(run()))
+
+
+def run_level(workers: int, args, env: dict) -> dict:
+    base_url = f"http://127.0.0.1:{args.port}"
+    server = subprocess.Popen(
+        [sys.executable, "serve.py", "--workers", str(workers), "--host", "127.0.0.1", "--port", str(args.port), "--log-level", "warning"],
+        cwd=REPO_ROOT, env=env,
+    )
+    try:
+        wait_until_up(base_url, server)
+        token = seed(base_url, args.tasks)
+        queue = multiprocessing.Queue()
+        procs = [multiprocessing.Process(target=load_process, args=(base_url, args.path, token, args.clients, args.seconds, queue)) for _ in range(args.load_procs)]
+        started = time.perf_counter()
+        for proc in procs:
+            proc.start()
+        results = [queue.get() for _ in procs]
+        elapsed = time.perf_counter() - started
+        for proc in procs:
+            proc.join()
+    finally:
+        server.terminate()  # SIGTERM -> graceful shutdown
+        server.wait(timeout=60)
+    latencies = [latency for result, _ in results for latency in result]
+    return summarize(latencies, elapsed, sum(errors for _, errors in results))
+
+
+def main_(args) -> dict:
+    env = {**os.environ, "DATABASE_URL": args.database_url or temp_sqlite_url("scaling.db")}
+    levels = {}
+    for workers in worker_counts(args.max_workers):
+        levels[f"workers_{workers}"] = run_level(workers, args, env)
+    base = levels["workers_1"]["rps"]
+    for result in levels.values():
+        result["scaling"] = round(result["rps"] / base, 2) if base else None
+    return {"config": vars(args), "cpu_count": os.cpu_count(), "results": levels}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--load-procs", type=int, default=max(1, (os.cpu_count() or 1) // 4))
+    parser.add_argument("--clients", type=int, default=64, help="connections per load process")
+    parser.add_argument("--seconds", type=float, default=10.0, help="load duration per worker count")
+    parser.add_argument("--tasks", type=int, default=1000, help="tasks seeded for the benchmark user")
+    parser.add_argument("--path", default="/tasks/?limit=20")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--database-url", default=None, help="default: a fresh SQLite file")
+    parser.add_argument("--output", default=None, help="also write the JSON result here")
+    args = parser.parse_args()
+    emit(main_(args), args.output)
@@ -0,0 +1,81 @@
+# SQLite write/read concurrency: default rollback journal vs main.SQLITE_PRAGMAS (WAL profile).
+#
+# For each profile a fresh database file is seeded, then writer and reader coroutines run at the same
+# time for a fixed duration, each on its own pooled connection:
+#   writers - INSERT one task + COMMIT (create_task's write)
+#   readers - one page of a user's tasks (get_tasks' read)
+# Reported per profile: writes/s, reads/s, latency percentiles and "database is locked" failures.
+#
+#   uv run python benchmarks/bench_sqlite_pragmas.py --writers 4 --readers 16 --seconds 10
+import argparse
+import asyncio
+import time
+
+from common import emit, import_main, summarize, temp_sqlite_url
+
+
+async def run_profile(main, tuned: bool, args) -> dict:
+    from sqlalchemy import event, insert, select
+    from sqlalchemy.ext.asyncio import create_async_engine
+
+    url = main.to_async_url(temp_sqlite_url(f"{'tuned' if tuned else 'default'}.db"))
+    engine = create_async_engine(url, pool_size=args.writers + args.readers, max_overflow=0)
+    if tuned:
+        event.listen(engine.sync_engine, "connect", main.apply_sqlite_pragmas)
+
+    async with engine.begin() as conn:
+        await conn.run_sync(main.create_schema)
+        await conn.execute(insert(main.User), [{"email": f"u{i}@example.com", "username": f"u{i}", "hashed_password": "x"} for i in range(args.users)])
+        await conn.execute(insert(main.Task), [{"title": f"seed {i}", "owner_id": i % args.users + 1} for i in range(args.seed_tasks)])
+
+    page = select(main.Task).order_by(main.Task.created_at.desc(), main.Task.id.desc()).limit(20)
+    results = {"writes": ([], [0]), "reads": ([], [0])}
+    deadline = time.perf_counter() + args.seconds
+
+    async def loop(kind: str, n: int):
+        latencies, errors = results[kind]
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            try:
+                if kind == "writes":
+                    async with engine.begin() as conn:
+                        await conn.execute(insert(main.Task).values(title="bench", owner_id=n % args.users + 1))
+                else:
+                    async with engine.connect() as conn:
+                        (await conn.execute(page.where(main.Task.owner_id == n % args.users + 1))).all()
+            except Exception:  # OperationalError: database is locked
+                errors[0] += 1
+                continue
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*[loop("writes", n) for n in range(args.writers)], *[loop("reads", n) for n in range(args.readers)])
+    elapsed = time.perf_counter() - started
+    await engine.dispose()
+    return {kind: summarize(latencies, elapsed, errors[0]) for kind, (latencies, errors) in results.items()}
+
+
+async def amain(args) -> dict:
+    main = import_main(temp_sqlite_url())
+    default = await run_profile(main, False, args)
+    tuned = await run_profile(main, True, args)
+    return {
+        "config": vars(args),
+        "pragmas": main.SQLITE_PRAGMAS,
+        "default": default,
+        "tuned": tuned,
+        "write_speedup": round(tuned["writes"]["rps"] / default["writes"]["rps"], 2) if default["writes"]["rps"] else None,
+        "read_speedup": round(tuned["reads"]["rps"] / default["reads"]["rps"], 2) if default["reads"]["rps"] else None,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--writers", type=int, default=4)
+    parser.add_argument("--readers", type=int, default=16)
+    parser.add_argument("--seconds", type=float, default=10.0, help="duration per profile")
+    parser.add_argument("--users", type=int, default=10)
+    parser.add_argument("--seed-tasks", type=int, default=20000)
+    parser.add_argument("--output", default=None, help="also write the JSON result here")
+    args = parser.parse_args()
+    emit(asyncio.run(amain(args)), args.output)
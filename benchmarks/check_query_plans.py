@@ -0,0 +1,123 @@
+# EXPLAIN QUERY PLAN check for GET /tasks/ filters and sorts (SQLite).
+#
+# Plans the statement GET /tasks/ runs (main.task_list_query) for every combination of filters
+# (status, priority, is_completed, due range) and every sort key, first page and cursor page for the
+# keyset sorts, on a seeded database after ANALYZE. Exits non-zero if a plan
+#   - scans the whole tasks table,
+#   - serves a filtered listing from the owner_id-only index (the filters are not indexed at all),
+#   - sorts a keyset page in a temp b-tree without a filter column narrowing the rows first
+#     (every page, however deep, sorts all of the user's tasks).
+# The summary also counts all plans that sort in a temp b-tree (e.g. sort=due_date, or a sort after status+due).
+#
+#   uv run python benchmarks/check_query_plans.py            # summary + failures
+#   uv run python benchmarks/check_query_plans.py --verbose  # every plan
+import argparse
+import asyncio
+import itertools
+import re
+import sys
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+from common import import_main, temp_sqlite_url
+
+FILTER_VALUES = {
+    "status": "todo",
+    "priority": "high",
+    "is_completed": False,
+    "due": (datetime(2026, 1, 1), datetime(2026, 6, 1)),
+}
+
+
+FILTER_COLUMNS = {"status", "priority", "is_completed", "due_date"}
+SEARCH_CONSTRAINTS = re.compile(r"\((.*)\)$")
+CURSOR_VALUES = {"created_at": datetime(2026, 3, 1), "updated_at": datetime(2026, 3, 1), "title": "task 5000"}
+
+
+def build_query(main, filters: dict, sort: str, with_cursor: bool):
+    # the statement GET /tasks/ runs (main.task_list_query), first page or a cursor page
+    due = filters.pop("due", (None, None))
+    task_filter = main.TaskFilter(**filters, due_after=due[0], due_before=due[1])
+    conditions = [main.Task.owner_id == 1, *main.task_filter_conditions(task_filter)]
+    sort_key = sort.lstrip("-")
+    cursor = None
+    if with_cursor:
+        cursor = main.encode_task_cursor(SimpleNamespace(id=5000, **{sort_key: CURSOR_VALUES[sort_key]}), sort_key)
+    return main.task_list_query(conditions, sort, list(main.TASK_FIELDS), cursor, 0, 20)
+
+
+async def seed(main, tasks: int) -> None:
+    from sqlalchemy import insert, text
+
+    async with main.engine.begin() as conn:
+        await conn.run_sync(main.create_schema)
+        await conn.execute(insert(main.User), [{"email": f"u{i}@example.com", "username": f"u{i}", "hashed_password": "x"} for i in range(10)])
+        statuses, priorities = list(main.TaskStatus), list(main.TaskPriority)
+        await conn.execute(insert(main.Task), [
+            {
+                "title": f"task {i}",
+                "owner_id": i % 10 + 1,
+                "status": statuses[i % len(statuses)],
+                "priority": priorities[i % len(priorities)],
+                "is_completed": i % 5 == 0,
+                "due_date": datetime(2026, 1, 1) + timedelta(days=i % 365) if i % 4 else None,
+            }
+            for i in range(tasks)
+        ])
+        await conn.execute(text("ANALYZE"))
+
+
+def searched_columns(plan: list) -> set:
+    # "SEARCH tasks USING INDEX ix (owner_id=? AND status=? AND due_date>?)" -> {"owner_id", "status", "due_date"}
+    columns = set()
+    for step in plan:
+        match = SEARCH_CONSTRAINTS.search(step)
+        if step.startswith("SEARCH tasks") and match:
+            columns.update(re.split(r"[=<>]", term)[0] for term in match.group(1).split(" AND "))
+    return columns
+
+
+def plan_problem(main, plan: list, filtered: bool, sort: str):
+    if any(step.startswith("SCAN tasks") and "INDEX" not in step for step in plan):
+        return "full table scan"
+    if filtered and any("USING INDEX ix_tasks_owner_id " in step for step in plan):
+        return "filters not covered by an index, only owner_id"
+    # a keyset page must come off an index in order; sorting is only tolerable after an index narrowed the rows
+    # by a filter column, a sort over every task of the user makes deep cursor pages as slow as skip
+    if sort.lstrip("-") in main.KEYSET_SORT_KEYS and any("TEMP B-TREE" in step for step in plan):
+        if not searched_columns(plan) & FILTER_COLUMNS:
+            return "keyset sort over all of the user's tasks in a temp b-tree"
+    return None
+
+
+async def amain(args) -> int:
+    main = import_main(temp_sqlite_url())
+    await seed(main, args.tasks)
+    failures, sorts_in_memory, checked = [], 0, 0
+    sorts = [key for key in main.TaskSort.__args__]
+    async with main.engine.connect() as conn:
+        for size in range(len(FILTER_VALUES) + 1):
+            for names in itertools.combinations(FILTER_VALUES, size):
+                for sort in sorts:
+                    for with_cursor in (False, True) if sort.lstrip("-") in main.KEYSET_SORT_KEYS else (False,):
+                        stmt = build_query(main, {name: FILTER_VALUES[name] for name in names}, sort, with_cursor)
+                        sql = str(stmt.compile(dialect=main.engine.dialect, compile_kwargs={"literal_binds": True}))
+                        plan = [row[-1] for row in (await conn.exec_driver_sql("EXPLAIN QUERY PLAN " + sql)).all()]
+                        checked += 1
+                        sorts_in_memory += any("TEMP B-TREE" in step for step in plan)
+                        problem = plan_problem(main, plan, bool(names), sort)
+                        label = f"filters={'+'.join(names) or '-'} sort={sort}{' cursor' if with_cursor else ''}"
+                        if problem:
+                            failures.append(label)
+                        if args.verbose or problem:
+                            print(f"{'FAIL' if problem else 'ok  '} {label}: {' | '.join(plan)}{f'  <- {problem}' if problem else ''}")
+    await main.engine.dispose()
+    print(f"{checked} queries checked, {len(failures)} failed, {sorts_in_memory} sort in a temp b-tree")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--tasks", type=int, default=20000, help="rows to seed before ANALYZE")
+    parser.add_argument("--verbose", action="store_true")
+    sys.exit(asyncio.run(amain(parser.parse_args())))
@@ -0,0 +1,79 @@
+# Shared helpers for the scripts in benchmarks/
+# Run every benchmark from the repo root, e.g. `uv run python benchmarks/bench_async_db.py`
+import asyncio
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
+
+def temp_sqlite_url(name: str = "bench.db") -> str:
+    # fresh database file per run so results do not depend on dev.db
+    return f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='bench-'), name)}"
+
+
+def import_main(database_url: str):
+    # main reads its settings at import time, so configure the environment first
+    os.environ["DATABASE_URL"] = database_url
+    os.environ.setdefault("PASSWORD_HASH_WORKERS", "0")
+    import main
+    return main
+
+
+def percentile(sorted_values: list, pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, round(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def summarize(latencies: list, elapsed: float, errors: int = 0) -> dict:
+    ordered = sorted(latencies)
+    ms = lambda seconds: round(seconds * 1000, 3)
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "elapsed_s": round(elapsed, 3),
+        "rps": round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        "mean_ms": ms(statistics.fmean(ordered)) if ordered else 0.0,
+        "p50_ms": ms(percentile(ordered, 50)),
+        "p95_ms": ms(percentile(ordered, 95)),
+        "p99_ms": ms(percentile(ordered, 99)),
+        "max_ms": ms(ordered[-1]) if ordered else 0.0,
+    }
+
+
+async def run_load(send, clients: int, total: int) -> dict:
+    # `send` is an async callable doing one request and returning True on success.
+    # `clients` workers share a counter and keep issuing requests until `total` have been sent.
+    latencies, errors, remaining = [], 0, total
+
+    async def worker():
+        nonlocal errors, remaining
+        while remaining > 0:
+            remaining -= 1
+            started = time.perf_counter()
+            try:
+                ok = await send()
+            except Exception:
+                ok = False
+            latencies.append(time.perf_counter() - started)
+            errors += 0 if ok else 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(clients)))
+    return summarize(latencies, time.perf_counter() - started, errors)
+
+
+def emit(result: dict, output: str = None) -> None:
+    text = json.dumps(result, indent=2)
+    print(text)
+    if output:
+        with open(output, "w") as fh:
+            fh.write(text + "\n")
@@ -0,0 +1,217 @@
+# Replay recorded traffic (REQUEST_RECORD_PATH traces, see "Request recording" in main.py) as a load generator.
+#
+# Requests keep their recorded timing, scaled by --speedup (2 = twice as fast, 0 = no pauses at all).
+# Each recorded auth subject is mapped onto one of --vus virtual users. A virtual user is a fresh account
+# seeded with --tasks-per-user tasks that sends its share of the trace in order, so create -> update ->
+# delete sequences stay causal. Anonymous requests (health, register, login) are sent on schedule on their own.
+# Rewrites needed because the trace comes from another database:
+#   /tasks/{id} and bulk "ids"  recorded ids map to tasks of the virtual user (created ones are tracked)
+#   /auth/login, /auth/register  bodies are not recorded (passwords), the virtual users' credentials are sent
+#   body_truncated records   skipped (counted in skipped_truncated), the cut-off body would just be a 422
+# Report (JSON): overall and per "METHOD route" latency summary, schedule lag (how late requests were sent
+# compared to the scaled recording; if it grows, the replayer or the app cannot keep up) and how many
+# responses came back with a different status than recorded.
+#
+#   uv run python benchmarks/replay.py traces/requests-*.jsonl --speedup 10 --vus 50
+#   uv run python benchmarks/replay.py traces/requests-*.jsonl --base-url http://127.0.0.1:8000
+import argparse
+import asyncio
+import glob
+import json
+import re
+import time
+import uuid
+
+from bench_api import PASSWORD, seed
+from common import emit, import_main, summarize, temp_sqlite_url
+
+TASK_PATH = re.compile(r"^/tasks/(\d+)(/.*)?$")
+
+
+def load_traces(patterns: list, limit: int = None) -> list:
+    records = []
+    for pattern in patterns:
+        for path in sorted(glob.glob(pattern)) or [pattern]:
+            with open(path, encoding="utf-8") as fh:
+                records.extend(json.loads(line) for line in fh if line.strip())
+    records.sort(key=lambda record: record["ts"])
+    return records[:limit] if limit else records
+
+
+class ReplayUser:
+    def __init__(self, username: str, task_ids: list):
+        self.username = username
+        self.task_ids = task_ids
+        self.id_map = {}  # recorded task id -> task id in this database
+        self.headers = {}
+
+    def task_id(self, recorded: int):
+        mapped = self.id_map.get(recorded)
+        if mapped is None and self.task_ids:
+            mapped = self.id_map[recorded] = self.task_ids[recorded % len(self.task_ids)]
+        return mapped
+
+    def forget(self, task_id: int) -> None:
+        if task_id in self.task_ids:
+            self.task_ids.remove(task_id)
+        self.id_map = {recorded: mapped for recorded, mapped in self.id_map.items() if mapped != task_id}
+
+
+class Replayer:
+    def __init__(self, client, users: list, speedup: float):
+        self.client = client
+        self.users = users
+        self.speedup = speedup
+        self.latencies = {}
+        self.errors = {}
+        self.lags = []
+        self.status_mismatches = 0
+        self.skipped_truncated = 0
+        self.next_anonymous = 0
+
+    def build_request(self, record: dict, user):
+        path, headers, content = record["path"], {}, None
+        if record.get("content_type"):
+            headers["content-type"] = record["content_type"]
+        if record.get("body") is not None:
+            content = record["body"].encode()
+        if path == "/auth/login":
+            account = user or self.users[self.next_anonymous % len(self.users)]
+            self.next_anonymous += 1
+            return path, {}, None, {"username": account.username, "password": PASSWORD}
+        if path == "/auth/register":
+            username = f"replay_{uuid.uuid4().hex[:12]}"
+            content = json.dumps({"email": f"{username}@example.com", "username": username, "password": PASSWORD}).encode()
+            headers["content-type"] = "application/json"
+        if user is not None:
+            headers.update(user.headers)
+            match = TASK_PATH.match(path)
+            if match:
+                task_id = user.task_id(int(match.group(1)))
+                path = f"/tasks/{task_id if task_id is not None else 0}{match.group(2) or ''}"
+            if content and path.startswith("/tasks/bulk/") and b'"ids"' in content:
+                try:
+                    body = json.loads(content)
+                    mapped = (user.task_id(task_id) for task_id in body.get("ids") or [])
+                    body["ids"] = [task_id for task_id in mapped if task_id is not None]
+                    content = json.dumps(body).encode()
+                except (ValueError, TypeError, AttributeError):
+                    pass
+        if record.get("query"):
+            path = f"{path}?{record['query']}"
+        return path, headers, content, None
+
+    async def send(self, record: dict, user, due: float, started: float) -> None:
+        if record.get("body_truncated"):
+            # the recorder cut the body at REQUEST_RECORD_MAX_BODY, replaying it would only measure a 422
+            self.skipped_truncated += 1
+            return
+        delay = due - (time.perf_counter() - started)
+        if delay > 0:
+            await asyncio.sleep(delay)
+        self.lags.append(max(0.0, -delay))
+        path, headers, content, form = self.build_request(record, user)
+        key = f"{record['method']} {record.get('route') or record['path']}"
+        sent = time.perf_counter()
+        try:
+            response = await self.client.request(record["method"], path, headers=headers, content=content, data=form)
+            status_code = response.status_code
+        except Exception:
+            status_code = None
+        self.latencies.setdefault(key, []).append(time.perf_counter() - sent)
+        self.errors[key] = self.errors.get(key, 0) + (0 if status_code is not None and status_code < 500 else 1)
+        self.status_mismatches += status_code != record.get("status")
+        if user is not None and status_code is not None:
+            self.track(record, path, user, response)
+
+    def track(self, record: dict, path: str, user: ReplayUser, response) -> None:
+        # keep the virtual user's task pool in line with what the replay created / deleted
+        if record["method"] == "POST" and record["path"] == "/tasks/" and response.status_code == 201:
+            user.task_ids.append(response.json()["id"])
+        elif record["method"] == "POST" and record["path"] in ("/tasks/bulk", "/tasks/bulk/ndjson") and response.status_code == 201:
+            user.task_ids.extend(task["id"] for task in response.json())
+        elif record["method"] == "DELETE" and response.status_code == 204:
+            match = TASK_PATH.match(path)
+            if match:
+                user.forget(int(match.group(1)))
+        elif record["path"] == "/tasks/bulk/delete" and response.status_code == 200:
+            for task_id in json.loads(response.request.content or b"{}").get("ids") or []:
+                user.forget(task_id)
+
+    async def run(self, records: list) -> dict:
+        t0 = records[0]["ts"]
+        due = lambda record: (record["ts"] - t0) / self.speedup if self.speedup > 0 else 0.0
+        subjects = {}
+        streams = [[] for _ in self.users]
+        anonymous = []
+        for record in records:
+            subject = record.get("subject")
+            if subject is None:
+                anonymous.append(record)
+            else:
+                streams[subjects.setdefault(subject, len(subjects) % len(self.users))].append(record)
+
+        async def run_stream(user: ReplayUser, stream: list):
+            for record in stream:
+                await self.send(record, user, due(record), started)
+
+        started = time.perf_counter()
+        await asyncio.gather(
+            *(run_stream(user, stream) for user, stream in zip(self.users, streams) if stream),
+            *(self.send(record, None, due(record), started) for record in anonymous),
+        )
+        elapsed = time.perf_counter() - started
+        lags = sorted(self.lags)
+        return {
+            "subjects": len(subjects),
+            "overall": summarize([latency for values in self.latencies.values() for latency in values], elapsed, sum(self.errors.values())),
+            "schedule_lag": {key: value for key, value in summarize(lags, elapsed).items() if key.endswith("_ms")},
+            "status_mismatches": self.status_mismatches,
+            "skipped_truncated": self.skipped_truncated,
+            "routes": {key: summarize(values, elapsed, self.errors[key]) for key, values in sorted(self.latencies.items())},
+        }
+
+
+async def replay(client, records: list, args) -> dict:
+    accounts = await seed(client, args.vus, args.vus * args.tasks_per_user)
+    users = [ReplayUser(username, task_ids) for username, task_ids in accounts]
+    for user in users:
+        token = (await client.post("/auth/login", data={"username": user.username, "password": PASSWORD})).json()["access_token"]
+        user.headers = {"Authorization": f"Bearer {token}"}
+    return await Replayer(client, users, args.speedup).run(records)
+
+
+async def amain(args) -> dict:
+    import httpx
+
+    records = load_traces(args.traces, args.limit)
+    if not records:
+        raise SystemExit("no requests in the given trace files")
+    recorded_span = records[-1]["ts"] - records[0]["ts"]
+    limits = httpx.Limits(max_connections=args.vus + 50, max_keepalive_connections=args.vus + 50)
+    if args.base_url:
+        async with httpx.AsyncClient(base_url=args.base_url, limits=limits, timeout=60.0) as client:
+            result = await replay(client, records, args)
+        target = args.base_url
+    else:
+        main = import_main(args.database_url or temp_sqlite_url("replay.db"))
+        async with main.app.router.lifespan_context(main.app):
+            transport = httpx.ASGITransport(app=main.app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://replay", limits=limits, timeout=60.0) as client:
+                result = await replay(client, records, args)
+        target = main.ASYNC_DATABASE_URL
+    return {"config": {**vars(args), "target": target}, "requests": len(records), "recorded_span_s": round(recorded_span, 3), **result}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("traces", nargs="+", help="trace files or glob patterns (REQUEST_RECORD_PATH output)")
+    parser.add_argument("--speedup", type=float, default=1.0, help="time compression, 0 = send as fast as possible")
+    parser.add_argument("--vus", type=int, default=20, help="virtual users the recorded subjects are spread over")
+    parser.add_argument("--tasks-per-user", type=int, default=100, help="tasks seeded per virtual user")
+    parser.add_argument("--limit", type=int, default=None, help="replay only the first N requests")
+    parser.add_argument("--base-url", default=None, help="replay against a running server instead of in-process")
+    parser.add_argument("--database-url", default=None, help="in-process only, default: a fresh SQLite file")
+    parser.add_argument("--output", default=None, help="also write the JSON result here")
+    args = parser.parse_args()
+    emit(asyncio.run(amain(args)), args.output)
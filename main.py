@@ -1,16 +1,41 @@
 
 #import  & config
-from typing import List, Optional
-from fastapi import FastAPI,HTTPException,Depends, status
-from pydantic import BaseModel, constr, Field, EmailStr  # <-- added EmailStr
-from sqlalchemy import create_engine, Column, Integer, String, Boolean, DateTime, Text, text, ForeignKey
-from sqlalchemy.orm import sessionmaker, declarative_base, Session, relationship
-from datetime  import datetime, timedelta
+from typing import List, Literal, Optional
+from fastapi import FastAPI,HTTPException,Depends, status, Request, Query, Response
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, constr, Field, EmailStr, TypeAdapter, ValidationError, model_validator  # <-- added EmailStr
+from pydantic_core import to_json
+from typing_extensions import TypedDict
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, Text, text, ForeignKey, Index, tuple_
+from sqlalchemy import event, select, update, delete, func, insert, table, column, literal_column
+from sqlalchemy.engine import make_url
+from sqlalchemy.orm import declarative_base, relationship
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+from sqlalchemy.exc import DBAPIError, SQLAlchemyError, TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from datetime  import datetime, timedelta, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from dataclasses import dataclass
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import asyncio
+import multiprocessing
 import os
+import base64
+import csv
+import hashlib
+import io
+import json
+import re
+import threading
+import time
+import zlib
 from dotenv import load_dotenv, find_dotenv
 from passlib.context import CryptContext
 from jose import jwt, JWTError
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
+from starlette.concurrency import run_in_threadpool
 from enum import Enum as PyEnum
 from sqlalchemy import Enum as SAEnum
 
@@ -41,16 +66,157 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
 
 
 
-#Database setup
+#Database setup (async)
+# Route handlers are `async def` and talk to the database through an AsyncSession, so a request
+# waiting on the database frees the event loop instead of holding one of the threadpool workers.
+# DATABASE_URL keeps its plain form; the async driver is filled in here:
+#   sqlite:///./dev.db      -> sqlite+aiosqlite:///./dev.db  (local dev / tests)
+#   postgresql://user@host  -> postgresql+asyncpg://user@host (prod)
+# An explicit driver in the URL (e.g. postgresql+psycopg://) is left untouched.
+ASYNC_DRIVERS = {"sqlite": "sqlite+aiosqlite", "postgresql": "postgresql+asyncpg", "postgres": "postgresql+asyncpg"}
+
+def to_async_url(url: str) -> str:
+    parsed = make_url(url)
+    return parsed.set(drivername=ASYNC_DRIVERS.get(parsed.drivername, parsed.drivername)).render_as_string(hide_password=False)
+
+ASYNC_DATABASE_URL = to_async_url(DATABASE_URL)
+
+# -------------------------
+# Connection pool settings (read from .env like DATABASE_URL)
+# -------------------------
+#   DB_POOL_SIZE       connections kept open in the pool
+#   DB_MAX_OVERFLOW    extra connections allowed above DB_POOL_SIZE under load
+#   DB_POOL_TIMEOUT    seconds a request waits for a free connection before failing
+#   DB_POOL_RECYCLE    seconds after which a connection is replaced (-1 = never)
+#   DB_POOL_PRE_PING   test each connection on checkout (drops stale connections after DB restarts)
+# RECYCLE and PRE_PING only matter for a networked database: on Postgres set e.g. DB_POOL_RECYCLE=1800
+# (below any server / proxy idle timeout) and DB_POOL_PRE_PING=true. A local SQLite file has no
+# connection to go stale, so the defaults leave both off and checkout costs no extra round trip.
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "-1"))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "false").lower() in ("1", "true", "yes")
+
+class PoolStats:
+    # counters fed by the pool events below; wait time is measured around Pool.connect()
+    def __init__(self):
+        self.connects = 0
+        self.checkouts = 0
+        self.checkins = 0
+        self.invalidations = 0
+        self.timeouts = 0
+        self.waits = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self._lock = threading.Lock()
+
+    def record_wait(self, seconds: float) -> None:
+        with self._lock:
+            self.waits += 1
+            self.wait_total += seconds
+            self.wait_max = max(self.wait_max, seconds)
+
+    def snapshot(self, pool) -> dict:
+        gauges = {}
+        if isinstance(pool, AsyncAdaptedQueuePool):
+            gauges = {"size": pool.size(), "checked_in": pool.checkedin(), "checked_out": pool.checkedout(), "overflow": max(pool.overflow(), 0)}
+        return {
+            **gauges,
+            "max_overflow": DB_MAX_OVERFLOW,
+            "connects": self.connects,
+            "checkouts": self.checkouts,
+            "checkins": self.checkins,
+            "invalidations": self.invalidations,
+            "timeouts": self.timeouts,
+            "wait_avg_ms": round(self.wait_total / self.waits * 1000, 3) if self.waits else 0.0,
+            "wait_max_ms": round(self.wait_max * 1000, 3),
+        }
+
+pool_stats = PoolStats()
+
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+    # same pool the async engine uses by default, plus timing of how long each checkout waited
+    def connect(self):
+        started = time.perf_counter()
+        try:
+            return super().connect()
+        except PoolTimeoutError:
+            pool_stats.timeouts += 1
+            raise
+        finally:
+            pool_stats.record_wait(time.perf_counter() - started)
+
+def pool_options(url: str) -> dict:
+    # in-memory SQLite lives inside a single connection (StaticPool), there is nothing to size
+    parsed = make_url(url)
+    if parsed.get_backend_name() == "sqlite" and parsed.database in (None, "", ":memory:"):
+        return {}
+    return {
+        "poolclass": InstrumentedQueuePool,
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_recycle": DB_POOL_RECYCLE,
+        "pool_pre_ping": DB_POOL_PRE_PING,
+    }
+
 # For sqlite disable same thread check for multithreading
-engine= create_engine(
-    DATABASE_URL,
+engine= create_async_engine(
+    ASYNC_DATABASE_URL,
     connect_args={"check_same_thread": False} if "sqlite" in DATABASE_URL else {},  # <-- use lowercase key
-    echo=False # To see the generated SQL queries
+    echo=False, # To see the generated SQL queries
+    **pool_options(ASYNC_DATABASE_URL),
 )
 
-#what this will do is create a session factory that will generate new Session objects when called.
-SessionLocal= sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# pool events fire on the sync engine that the async engine wraps
+@event.listens_for(engine.sync_engine, "connect")
+def on_pool_connect(dbapi_connection, connection_record):
+    pool_stats.connects += 1
+
+@event.listens_for(engine.sync_engine, "checkout")
+def on_pool_checkout(dbapi_connection, connection_record, connection_proxy):
+    pool_stats.checkouts += 1
+
+@event.listens_for(engine.sync_engine, "checkin")
+def on_pool_checkin(dbapi_connection, connection_record):
+    pool_stats.checkins += 1
+
+@event.listens_for(engine.sync_engine, "invalidate")
+def on_pool_invalidate(dbapi_connection, connection_record, exception):
+    pool_stats.invalidations += 1
+
+# -------------------------
+# SQLite production profile
+# -------------------------
+# Applied to every new SQLite connection when DATABASE_URL is SQLite (turn off with SQLITE_TUNING=false).
+# WAL lets readers in get_tasks run while create_task/update_task write; synchronous=NORMAL is durable
+# across app crashes in WAL mode and only fsyncs at checkpoints; busy_timeout makes writers wait for
+# the lock instead of failing with "database is locked".
+SQLITE_TUNING = os.getenv("SQLITE_TUNING", "true").lower() in ("1", "true", "yes")
+SQLITE_PRAGMAS = {
+    "journal_mode": os.getenv("SQLITE_JOURNAL_MODE", "WAL"),
+    "synchronous": os.getenv("SQLITE_SYNCHRONOUS", "NORMAL"),
+    "mmap_size": int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024))),  # bytes
+    "cache_size": int(os.getenv("SQLITE_CACHE_SIZE", "-65536")),  # negative = KiB, i.e. 64 MiB per connection
+    "temp_store": os.getenv("SQLITE_TEMP_STORE", "MEMORY"),
+    "busy_timeout": int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000")),
+}
+
+def apply_sqlite_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    try:
+        for name, value in SQLITE_PRAGMAS.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+    finally:
+        cursor.close()
+
+if SQLITE_TUNING and engine.dialect.name == "sqlite":
+    event.listen(engine.sync_engine, "connect", apply_sqlite_pragmas)
+
+#what this will do is create a session factory that will generate new AsyncSession objects when called.
+# expire_on_commit=False: returned objects stay readable after commit (async sessions cannot lazy-load on attribute access)
+SessionLocal= async_sessionmaker(bind=engine, autoflush=False, expire_on_commit=False)
 # what this will do is create a base class for our ORM models to inherit from.
 #can you explain declarative_base in sqlalchemy
 #Declarative_base is a factory function in SQLAlchemy that creates a base class for your ORM models to inherit from when using the declarative system.
@@ -112,11 +278,22 @@ class User(Base):
 # -------------------------
 # Helper DB functions
 # -------------------------
-def get_user_by_username(db: Session, username: str) -> Optional[User]:
-    return db.query(User).filter((User.username== username)).first()
+async def get_user_by_username(db: AsyncSession, username: str) -> Optional[User]:
+    return await db.scalar(select(User).where(User.username== username))
 
-def get_user_by_email(db: Session, email: str) -> Optional[User]:
-    return db.query(User).filter((User.email== email)).first()
+async def get_user_by_email(db: AsyncSession, email: str) -> Optional[User]:
+    return await db.scalar(select(User).where(User.email== email))
+
+async def create_user(db: AsyncSession, email: str, username: str, hashed_password: str) -> User:
+    user = User(email= email, username= username, hashed_password= hashed_password)
+    db.add(user)
+    await db.flush()
+    # counter / list version rows in the same transaction, so adjust_task_count and bump_task_list_version always have a row to update
+    db.add(UserTaskCount(user_id=user.id, task_count=0))
+    db.add(UserTaskListVersion(user_id=user.id, version=0))
+    await db.commit()
+    await db.refresh(user)
+    return user
 ####################################################################
 #lesson 3: password hashing functions
 ####################################################################
@@ -141,6 +318,84 @@ def get_password_hash(password: str) -> str:
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
 
+####################################################################
+# Async password hashing service
+# Argon2 costs tens of ms of CPU per call. Running it inline in a sync route ties up one of
+# Starlette's shared threadpool workers, so a login burst starves every other endpoint.
+# PasswordHasher sends the work to a dedicated process pool instead (one core per worker)
+# and rejects new work with 503 once max_pending calls are already queued.
+#   PASSWORD_HASH_WORKERS      number of hashing processes (default: CPU count, 0 = run in the threadpool)
+#   PASSWORD_HASH_MAX_PENDING  queue-depth limit across all workers
+####################################################################
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(os.cpu_count() or 1)))
+PASSWORD_HASH_MAX_PENDING = int(os.getenv("PASSWORD_HASH_MAX_PENDING", "64"))
+
+class PasswordHasher:
+    def __init__(self, max_workers: int, max_pending: int):
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.pending = 0  # only touched from the event loop thread
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    def start(self) -> None:
+        if self.max_workers > 0 and self._executor is None:
+            # spawn, not fork: forking a process that already runs threads can deadlock the child
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers, mp_context=multiprocessing.get_context("spawn"))
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+    def restart(self, broken: ProcessPoolExecutor) -> None:
+        if self._executor is broken:
+            self._executor = None
+            broken.shutdown(wait=False, cancel_futures=True)
+            self.start()
+
+    async def _run(self, func, *args):
+        if self.pending >= self.max_pending:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Too many concurrent password operations, retry shortly",
+                headers={"Retry-After": "1"},
+            )
+        self.pending += 1
+        try:
+            if self._executor is None:
+                return await run_in_threadpool(func, *args)
+            for attempt in range(2):
+                executor = self._executor
+                try:
+                    return await asyncio.get_running_loop().run_in_executor(executor, func, *args)
+                except BrokenProcessPool:
+                    # a worker died (OOM kill, crash) and the pool refuses all further work: replace it once,
+                    # unless a concurrent request already did, then retry; a second failure is a 503
+                    self.restart(executor)
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Password hashing is temporarily unavailable, retry shortly",
+                headers={"Retry-After": "1"},
+            )
+        finally:
+            self.pending -= 1
+
+    async def hash(self, password: str) -> str:
+        started = time.perf_counter()
+        try:
+            return await self._run(get_password_hash, password)
+        finally:
+            password_hash_duration.observe(("hash",), time.perf_counter() - started)
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        started = time.perf_counter()
+        try:
+            return await self._run(verify_password, plain_password, hashed_password)
+        finally:
+            password_hash_duration.observe(("verify",), time.perf_counter() - started)
+
+password_hasher = PasswordHasher(max_workers=PASSWORD_HASH_WORKERS, max_pending=PASSWORD_HASH_MAX_PENDING)
+
 ####################################################################
 # -------------------------
 # Strict enums for Task (Lesson 6 - improved)
@@ -176,6 +431,58 @@ class Task(Base):
     # Adding status and priority fields with strict enums
     status = Column(SAEnum(TaskStatus, name="task_status"), default=TaskStatus.TODO, nullable=False)
     priority = Column(SAEnum(TaskPriority, name="task_priority"), default=TaskPriority.MEDIUM, nullable=False)
+
+    # Composite index for keyset pagination: lets GET /tasks/ seek straight to (owner, created_at, id)
+    # instead of scanning and discarding `skip` rows
+    __table_args__ = (
+        Index("ix_tasks_owner_created_id", "owner_id", "created_at", "id"),
+        # filtered / sorted listings on GET /tasks/ (see benchmarks/check_query_plans.py)
+        Index("ix_tasks_owner_status_due", "owner_id", "status", "due_date"),
+        Index("ix_tasks_owner_priority_created", "owner_id", "priority", "created_at"),
+        Index("ix_tasks_owner_completed_created", "owner_id", "is_completed", "created_at"),
+        Index("ix_tasks_owner_updated_id", "owner_id", "updated_at", "id"),
+        Index("ix_tasks_owner_title_id", "owner_id", "title", "id"),
+    )
+# -------------------------
+# Per-user task counter
+# -------------------------
+# Side table instead of a users column so existing databases pick it up through create_all.
+# Rows are created with the user (create_user; older users are backfilled by create_schema at startup)
+# and then kept current by the write endpoints,
+# so GET /tasks/ reads one row by primary key instead of counting the user's tasks every time.
+class UserTaskCount(Base):
+    __tablename__ = "user_task_counts"
+    user_id= Column(Integer, ForeignKey("users.id"), primary_key=True)
+    task_count= Column(Integer, default=0, nullable=False)
+
+# -------------------------
+# Per-user task list version
+# -------------------------
+# Incremented inside every write transaction that touches one of the user's tasks, so the list ETag
+# (see Conditional GETs) moves with every committed change. Count + MAX(updated_at) cannot do that:
+# updated_at is stamped before the statement runs, so an update stamped earlier but committed later
+# changes neither. Created with the user like UserTaskCount.
+class UserTaskListVersion(Base):
+    __tablename__ = "user_task_list_versions"
+    user_id= Column(Integer, ForeignKey("users.id"), primary_key=True)
+    version= Column(Integer, default=0, nullable=False)
+
+# -------------------------
+# Deleted-task tombstones
+# -------------------------
+# One row per deleted task so GET /tasks/changes can tell sync clients what disappeared.
+# Rows older than TOMBSTONE_RETENTION_DAYS are compacted away (see Delta sync).
+class TaskTombstone(Base):
+    __tablename__ = "task_tombstones"
+    id= Column(Integer, primary_key=True)
+    task_id= Column(Integer, nullable=False)
+    owner_id= Column(Integer, ForeignKey("users.id"), nullable=False)
+    deleted_at= Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    __table_args__ = (
+        Index("ix_task_tombstones_owner_deleted_task", "owner_id", "deleted_at", "task_id"),
+        Index("ix_task_tombstones_deleted", "deleted_at"),  # retention compaction
+    )
 ####################################################################
 #pydantic schemas for Task uisng Enums
 # what are pydantic schemas
@@ -220,9 +527,80 @@ class TaskResponse(BaseModel):
 
 class TaskListResponse(BaseModel):
     tasks: List[TaskResponse]
-    total: int
+    total: Optional[int] = None  # None when the client asked for include_total=false
     skip: int
     limit: int
+    # opaque cursor for the next page; pass it back as ?cursor= (None when there are no more tasks)
+    next_cursor: Optional[str] = None
+
+# Lean list read path: GET /tasks/ selects plain column rows instead of ORM Task
+# objects, so a task is a TypedDict (validated as a dict, no attribute access) and
+# only the columns picked with ?fields= are present. The wire format matches TaskListResponse.
+class TaskRow(TypedDict, total=False):
+    id: int
+    title: str
+    description: Optional[str]
+    is_completed: bool
+    due_date: Optional[datetime]
+    created_at: datetime
+    updated_at: datetime
+    owner_id: int
+    status: TaskStatus
+    priority: TaskPriority
+
+class TaskRowListResponse(TaskListResponse):
+    tasks: List[TaskRow]
+
+TASK_FIELDS = tuple(TaskResponse.model_fields)
+
+# GET /tasks/changes page: apply `deleted` before `updated`, then poll again with next_cursor
+class TaskChangesResponse(BaseModel):
+    updated: List[TaskResponse]  # created or changed tasks, oldest change first
+    deleted: List[int]  # ids of deleted tasks
+    next_cursor: str
+    has_more: bool  # true: call again right away with next_cursor
+
+# Task filter shared by GET /tasks/ query parameters and the bulk operations
+class TaskFilter(BaseModel):
+    status: Optional[TaskStatus] = None
+    priority: Optional[TaskPriority] = None
+    is_completed: Optional[bool] = None
+    due_after: Optional[datetime] = None
+    due_before: Optional[datetime] = None
+
+# Bulk operations: pick tasks by explicit ids and/or a filter (both given = both must match).
+# An empty filter ({}) selects every task of the user.
+
+class TaskSelection(BaseModel):
+    ids: Optional[List[int]] = None
+    filter: Optional[TaskFilter] = None
+
+    @model_validator(mode="after")
+    def check_selection(self):
+        if self.ids is None and self.filter is None:
+            raise ValueError("Provide ids, filter, or both")
+        return self
+
+class TaskBulkUpdate(TaskSelection):
+    changes: TaskUpdate
+
+class BulkResult(BaseModel):
+    affected: int
+
+# POST /tasks/import report
+class ImportLineError(BaseModel):
+    line: int  # 1-based line of the body (first line of the record for multi-line CSV records)
+    errors: List[dict]
+
+class ImportProgress(BaseModel):
+    imported: int
+    failed: int
+    batches: int  # committed transactions
+    line: int  # last body line of the last committed batch; nothing after it has been written
+
+class ImportResult(ImportProgress):
+    errors: List[ImportLineError]  # the first IMPORT_MAX_ERRORS failures only; `failed` counts all of them
+    error: Optional[str] = None  # set when a database error stopped the import; the counts are what was committed
 
 # -------------------------
 # Pydantic schemas (User)
@@ -261,33 +639,202 @@ class UserLoginResponse(BaseModel):
 # Testability: you can override this dependency in tests to inject a test DB/session.
 # Works with FastAPI lifecycle: using yield in dependency acts like a setup/teardown (similar to context manager).
 ####################################################################
-def get_db():
-    db= SessionLocal()
-    try:
+async def get_db():
+    async with SessionLocal() as db:
         yield db
-    finally:
-        db.close()
+
+####################################################################
+# In-process caches
+# TTLCache: small thread-safe LRU with per-entry expiry and hit/miss counters.
+# Each worker process has its own copy, so keep TTLs short and invalidate on writes.
+####################################################################
+class TTLCache:
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data: OrderedDict = OrderedDict()  # key -> (expires_at, value), oldest first
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or entry[0] <= time.monotonic():
+                if entry is not None:
+                    del self._data[key]
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key, value, ttl: Optional[float] = None) -> None:
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        if ttl <= 0 or self.maxsize <= 0:
+            return
+        with self._lock:
+            self._data[key] = (time.monotonic() + ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def pop(self, key) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def pop_where(self, predicate) -> None:
+        with self._lock:
+            for key in [k for k, (_, value) in self._data.items() if predicate(value)]:
+                del self._data[key]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+# -------------------------
+# Authenticated-user cache
+# -------------------------
+# get_current_user returns a CurrentUser snapshot instead of the session-bound User row,
+# so a cached value can be shared safely between requests and threads.
+USER_CACHE_TTL_SECONDS = float(os.getenv("USER_CACHE_TTL_SECONDS", "60"))
+USER_CACHE_MAX_SIZE = int(os.getenv("USER_CACHE_MAX_SIZE", "10000"))
+
+@dataclass(frozen=True)
+class CurrentUser:
+    id: int
+    email: str
+    username: str
+    is_active: bool
+    created_at: datetime
+
+    @classmethod
+    def from_orm_user(cls, user: User) -> "CurrentUser":
+        return cls(id=user.id, email=user.email, username=user.username, is_active=user.is_active, created_at=user.created_at)
+
+user_cache = TTLCache(maxsize=USER_CACHE_MAX_SIZE, ttl=USER_CACHE_TTL_SECONDS)
+
+# drop cached snapshots whenever a user row is changed (deactivated, renamed, ...) or deleted
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def invalidate_cached_user(mapper, connection, target: User) -> None:
+    user_cache.pop(target.username)
+    # on a rename the entry is still keyed by the old username, so match on id as well
+    user_cache.pop_where(lambda snapshot: snapshot.id == target.id)
+
+# -------------------------
+# Verified-token cache
+# -------------------------
+# Skips HMAC verification + JSON parsing for bearer tokens we have already verified.
+# Keyed by a SHA-256 digest (raw tokens never sit in memory as keys) and each entry expires at the token's exp.
+TOKEN_CACHE_MAX_SIZE = int(os.getenv("TOKEN_CACHE_MAX_SIZE", "10000"))
+
+token_cache = TTLCache(maxsize=TOKEN_CACHE_MAX_SIZE, ttl=ACCESS_TOKEN_EXPIRE_MINUTES * 60)
+
+def decode_access_token(token: str) -> dict:
+    # raises JWTError for invalid or expired tokens; failures are never cached
+    key = hashlib.sha256(token.encode()).digest()
+    payload = token_cache.get(key)
+    if payload is None:
+        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        if "exp" in payload:
+            token_cache.set(key, payload, ttl=payload["exp"] - time.time())
+    return payload
 
 ####################################################################
 #get current user from token function
 #get current user from token
-def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
+async def get_current_user(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_db)) -> CurrentUser:
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        payload = decode_access_token(token)
         username: str | None = payload.get("sub")
         if username is None:
             raise credentials_exception
     except JWTError:
         raise credentials_exception
-    user = get_user_by_username(db, username)
-    if user is None:
-        raise credentials_exception
-    return user
+    current_user = user_cache.get(username)
+    if current_user is None:
+        user = await get_user_by_username(db, username)
+        if user is None:
+            raise credentials_exception
+        current_user = CurrentUser.from_orm_user(user)
+        user_cache.set(username, current_user)
+    return current_user
+
+####################################################################
+# Fast JSON responses
+# Task routes build their response model themselves (validated once, straight from ORM attributes
+# or RETURNING rows) and hand it to json_response(), which lets pydantic-core write the JSON bytes
+# in Rust. Returning a Response makes FastAPI skip its response_model pass, i.e. the second
+# validation and the dict + json.dumps encoding. response_model stays on the routes for the docs.
+# Routes returning a bare list of tasks (bulk create) validate it with TASK_LIST_ADAPTER.
+####################################################################
+TASK_LIST_ADAPTER = TypeAdapter(List[TaskResponse])
+
+def json_response(model: BaseModel | list, status_code: int = status.HTTP_200_OK, exclude=None) -> Response:
+    return Response(content=to_json(model, exclude=exclude), media_type="application/json", status_code=status_code)
+
+####################################################################
+# Conditional GETs (ETag / If-None-Match, Last-Modified / If-Modified-Since)
+# Single task: ETag from (id, updated_at), Last-Modified = updated_at.
+# Task list: ETag from the per-user list version (UserTaskListVersion, one row by primary key) plus
+# the query string since filters, sort and fields change the body. Every write path increments the
+# version in its own transaction (bump_task_list_version), so the ETag moves with every committed
+# change, whatever updated_at the change was stamped with.
+# Lists carry no Last-Modified: there is no timestamp that moves with every change.
+# On a match the route answers 304 before reading the page or serializing anything.
+####################################################################
+def task_etag(task_id: int, updated_at: datetime) -> str:
+    return f'"{task_id}-{updated_at:%Y%m%d%H%M%S%f}"'
+
+def http_date(value: datetime) -> str:
+    # timestamps are stored as naive UTC (datetime.utcnow)
+    return format_datetime(value.replace(tzinfo=timezone.utc), usegmt=True)
+
+def validator_headers(etag: str, last_modified: Optional[datetime] = None) -> dict:
+    # private: per-user data; no-cache: clients may store it but must revalidate before reuse
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if last_modified is not None:
+        headers["Last-Modified"] = http_date(last_modified)
+    return headers
+
+def is_not_modified(request: Request, etag: str, last_modified: Optional[datetime] = None) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        # If-None-Match takes precedence over If-Modified-Since; weak comparison, so W/ prefixes are ignored
+        tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+        return "*" in tags or etag in tags
+    if_modified_since = request.headers.get("if-modified-since")
+    if last_modified is None or not if_modified_since:
+        return False
+    try:
+        since = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+    if since.tzinfo is None:
+        since = since.replace(tzinfo=timezone.utc)
+    # HTTP dates have second resolution
+    return last_modified.replace(microsecond=0, tzinfo=timezone.utc) <= since
+
+def not_modified_response(etag: str, last_modified: Optional[datetime] = None) -> Response:
+    return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=validator_headers(etag, last_modified))
+
 ####################################################################
 #FastAPI app and middlewares
 ######################################################################
@@ -340,6 +887,623 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+####################################################################
+# Response compression
+# Plain ASGI middleware (BaseHTTPMiddleware would add a task + memory stream per request) that
+# compresses JSON / NDJSON / CSV / text bodies with the best encoding the client accepts:
+#   COMPRESSION_ENCODINGS   server preference order, default "zstd,br,gzip" (empty = off);
+#                           br and zstd need the optional brotli / zstandard packages (.[compression])
+#   COMPRESSION_MIN_SIZE    smaller bodies are sent as is, compressing them costs more than it saves
+#   GZIP_LEVEL, BROTLI_QUALITY, ZSTD_LEVEL   compression levels
+# Streamed bodies (GET /tasks/export) are compressed chunk by chunk. Responses that already
+# have a Content-Encoding (export with compress=true) or Cache-Control: no-transform (import
+# progress, whose lines must not sit in a compressor buffer) are left alone.
+# Compressed responses get a weak ETag (W/"..."), and so do 304s to clients that negotiated an
+# encoding, so a revalidation returns the same validator as the 200 it revalidates.
+# Precompressed cache: responses that carry an ETag (task reads, see Conditional GETs) are
+# compressed once per (encoding, path, query string, ETag) and served from a small TTLCache after
+# that, so a repeated page costs a dict lookup instead of another compression pass. Hashing the
+# body would cost about as much as zstd level 1 on a large page. The cached bytes replace the body
+# the route built without a comparison, so this is only sound because both task ETags move with
+# every committed change: the row's updated_at for one task, the per-user list version (bumped in
+# the write transaction, read before the page) for lists. A write path that skips
+# bump_task_list_version would serve gzip clients a stale 200 until the entry expires.
+####################################################################
+try:
+    import brotli
+except ImportError:
+    brotli = None
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+from starlette.datastructures import MutableHeaders
+
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))
+GZIP_LEVEL = int(os.getenv("GZIP_LEVEL", "6"))
+BROTLI_QUALITY = int(os.getenv("BROTLI_QUALITY", "4"))
+ZSTD_LEVEL = int(os.getenv("ZSTD_LEVEL", "3"))
+COMPRESSION_CACHE_MAX_SIZE = int(os.getenv("COMPRESSION_CACHE_MAX_SIZE", "256"))
+COMPRESSION_CACHE_TTL_SECONDS = float(os.getenv("COMPRESSION_CACHE_TTL_SECONDS", "60"))
+COMPRESSION_CACHE_MAX_BODY = int(os.getenv("COMPRESSION_CACHE_MAX_BODY", str(1024 * 1024)))
+COMPRESSIBLE_TYPES = ("application/json", "application/x-ndjson", "text/")
+
+class GzipCompressor:
+    def __init__(self):
+        self._zlib = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._zlib.compress(data)
+
+    def finish(self) -> bytes:
+        return self._zlib.flush()
+
+class BrotliCompressor:
+    def __init__(self):
+        self._brotli = brotli.Compressor(quality=BROTLI_QUALITY)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._brotli.process(data)
+
+    def finish(self) -> bytes:
+        return self._brotli.finish()
+
+class ZstdCompressor:
+    def __init__(self):
+        self._zstd = zstandard.ZstdCompressor(level=ZSTD_LEVEL).compressobj()
+
+    def compress(self, data: bytes) -> bytes:
+        return self._zstd.compress(data)
+
+    def finish(self) -> bytes:
+        return self._zstd.flush()
+
+COMPRESSORS = {"gzip": GzipCompressor}
+if brotli is not None:
+    COMPRESSORS["br"] = BrotliCompressor
+if zstandard is not None:
+    COMPRESSORS["zstd"] = ZstdCompressor
+COMPRESSION_ENCODINGS = [name for name in (e.strip() for e in os.getenv("COMPRESSION_ENCODINGS", "zstd,br,gzip").split(",")) if name in COMPRESSORS]
+
+compression_cache = TTLCache(maxsize=COMPRESSION_CACHE_MAX_SIZE, ttl=COMPRESSION_CACHE_TTL_SECONDS)
+
+def negotiate_encoding(accept_encoding: str, encodings: List[str]) -> Optional[str]:
+    # highest q-value wins, ties go to the server preference order; None = send identity
+    weights = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.partition(";")
+        q = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        weights[name.strip().lower()] = q
+    best, best_q = None, 0.0
+    for encoding in encodings:
+        q = weights.get(encoding, weights.get("*", 0.0))
+        if q > best_q:
+            best, best_q = encoding, q
+    if best is not None and weights.get("identity", 0.0) > best_q:
+        return None
+    return best
+
+def compress_body(encoding: str, body: bytes, cache_key: Optional[tuple] = None) -> bytes:
+    if cache_key is not None and len(body) <= COMPRESSION_CACHE_MAX_BODY:
+        key = (encoding, *cache_key)
+        compressed = compression_cache.get(key)
+        if compressed is None:
+            compressed = compress_body(encoding, body)
+            compression_cache.set(key, compressed)
+        return compressed
+    compressor = COMPRESSORS[encoding]()
+    return compressor.compress(body) + compressor.finish()
+
+def weaken_etag(headers: MutableHeaders) -> None:
+    # the bytes differ from the identity body, so the validator may only be weak
+    etag = headers.get("etag")
+    if etag and not etag.startswith("W/"):
+        headers["ETag"] = "W/" + etag
+
+class CompressionMiddleware:
+    def __init__(self, app, encodings: List[str], min_size: int):
+        self.app = app
+        self.encodings = encodings
+        self.min_size = min_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        accept_encoding = next((value.decode("latin-1") for name, value in scope["headers"] if name == b"accept-encoding"), "")
+        encoding = negotiate_encoding(accept_encoding, self.encodings) if accept_encoding else None
+        if encoding is None:
+            return await self.app(scope, receive, send)
+
+        start = None
+        compressor = None
+        passthrough = False
+
+        async def send_compressed(message):
+            nonlocal start, compressor, passthrough
+            if message["type"] == "http.response.start":
+                start = message  # held back until the first body chunk decides
+                return
+            if message["type"] != "http.response.body" or passthrough:
+                await send(message)
+                return
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            if compressor is None:
+                headers = MutableHeaders(scope=start)
+                if start["status"] == 304:
+                    # revalidates the representation a 200 would send compressed, so it carries the same weak ETag
+                    weaken_etag(headers)
+                    headers.add_vary_header("Accept-Encoding")
+                content_type = headers.get("content-type", "")
+                if (
+                    start["status"] < 200 or start["status"] in (204, 304)
+                    or "content-encoding" in headers
+                    or "no-transform" in headers.get("cache-control", "")
+                    or not content_type.startswith(COMPRESSIBLE_TYPES)
+                    or (not more_body and len(body) < self.min_size)
+                ):
+                    passthrough = True
+                    await send(start)
+                    await send(message)
+                    return
+                etag = headers.get("etag")
+                headers["Content-Encoding"] = encoding
+                headers.add_vary_header("Accept-Encoding")
+                weaken_etag(headers)
+                if not more_body:
+                    body = compress_body(encoding, body, (scope["path"], scope["query_string"], etag) if etag else None)
+                    headers["Content-Length"] = str(len(body))
+                    await send(start)
+                    await send({"type": "http.response.body", "body": body})
+                    return
+                # streamed: length unknown up front
+                del headers["Content-Length"]
+                compressor = COMPRESSORS[encoding]()
+                await send(start)
+            data = compressor.compress(body)
+            if not more_body:
+                data += compressor.finish()
+            if data or not more_body:
+                await send({"type": "http.response.body", "body": data, "more_body": more_body})
+
+        await self.app(scope, receive, send_compressed)
+
+if COMPRESSION_ENCODINGS:
+    app.add_middleware(CompressionMiddleware, encodings=COMPRESSION_ENCODINGS, min_size=COMPRESSION_MIN_SIZE)
+####################################################################
+# Metrics (Prometheus text format at GET /metrics)
+#   http_requests_total / http_request_duration_seconds / http_response_size_bytes   per route template
+#   http_requests_in_progress                                                        in-flight gauge
+#   db_queries_total / db_query_duration_seconds                                     every cursor execute
+#   db_queries_per_request / db_time_per_request_seconds                             per route
+#   password_hash_duration_seconds                                                   hash / verify, incl. queueing
+#   db_pool_*                                                                         pool_stats gauges
+# Every update happens on the event loop thread (the ASGI middleware, SQLAlchemy's cursor events
+# under the async engine, PasswordHasher awaits), so the metrics are plain dicts and lists with
+# no locks. Per-request DB numbers travel in a ContextVar set by the middleware.
+# Multi-process deployments (serve.py --workers N): set METRICS_DIR to a directory shared by the
+# workers. Each worker writes a JSON snapshot there every METRICS_FLUSH_SECONDS and at shutdown,
+# and /metrics merges all snapshots. Counters and histograms are summed, including workers that
+# have exited. Gauges only count live workers.
+####################################################################
+import contextvars
+from bisect import bisect_left
+
+METRICS_DIR = os.getenv("METRICS_DIR", "")
+METRICS_FLUSH_SECONDS = float(os.getenv("METRICS_FLUSH_SECONDS", "5"))
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (100, 1000, 10_000, 100_000, 1_000_000, 10_000_000)
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name: str, help_text: str, labelnames: tuple = ()):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = labelnames
+        self.values: dict = {}  # label values tuple -> number
+
+    def inc(self, labels: tuple = (), amount: float = 1) -> None:
+        self.values[labels] = self.values.get(labels, 0) + amount
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def set(self, labels: tuple, value: float) -> None:
+        self.values[labels] = value
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, labelnames: tuple = (), buckets: tuple = LATENCY_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = labelnames
+        self.buckets = buckets
+        self.values: dict = {}  # label values tuple -> [count per bucket..., count above the last bucket, sum]
+
+    def observe(self, labels: tuple, value: float) -> None:
+        entry = self.values.get(labels)
+        if entry is None:
+            entry = self.values[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+        entry[bisect_left(self.buckets, value)] += 1
+        entry[-1] += value
+
+http_requests = Counter("http_requests_total", "Requests handled", ("method", "route", "status"))
+http_duration = Histogram("http_request_duration_seconds", "Request latency", ("method", "route"))
+http_response_size = Histogram("http_response_size_bytes", "Response body size as sent", ("route",), SIZE_BUCKETS)
+http_in_progress = Gauge("http_requests_in_progress", "Requests being handled", ("method",))
+db_queries = Counter("db_queries_total", "SQL statements executed")
+db_duration = Histogram("db_query_duration_seconds", "SQL statement latency")
+db_queries_per_request = Histogram("db_queries_per_request", "SQL statements per request", ("route",), COUNT_BUCKETS)
+db_time_per_request = Histogram("db_time_per_request_seconds", "Time in SQL per request", ("route",))
+password_hash_duration = Histogram("password_hash_duration_seconds", "Password hash/verify time incl. queueing", ("operation",), (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0))
+pool_gauges = Gauge("db_pool", "Connection pool state (see /metrics/pool)", ("field",))
+METRICS = [http_requests, http_duration, http_response_size, http_in_progress, db_queries, db_duration, db_queries_per_request, db_time_per_request, password_hash_duration, pool_gauges]
+
+request_db_stats: contextvars.ContextVar = contextvars.ContextVar("request_db_stats", default=None)  # [queries, seconds]
+request_query_profile: contextvars.ContextVar = contextvars.ContextVar("request_query_profile", default=None)  # [(statement, seconds)], see Query profiler
+
+# The start time lives on the execution context, not on the connection: after_cursor_execute does not fire
+# for a statement that fails, and a per-connection stack would keep its timer and pair it with the next one.
+@event.listens_for(engine.sync_engine, "before_cursor_execute")
+def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    context._query_started = time.perf_counter()
+
+@event.listens_for(engine.sync_engine, "after_cursor_execute")
+def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - context._query_started
+    db_queries.inc()
+    db_duration.observe((), elapsed)
+    stats = request_db_stats.get()
+    if stats is not None:
+        stats[0] += 1
+        stats[1] += elapsed
+    profile = request_query_profile.get()
+    if profile is not None:
+        profile.append((statement, elapsed))
+
+class MetricsMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        method = scope["method"]
+        status_code = 500  # if the app raises before sending a response
+        size = 0
+        stats = [0, 0.0]
+        request_db_stats.set(stats)
+
+        async def send_measured(message):
+            nonlocal status_code, size
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            await send(message)
+
+        http_in_progress.inc((method,))
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_measured)
+        finally:
+            elapsed = time.perf_counter() - started
+            http_in_progress.inc((method,), -1)
+            # route template, not the raw path, so /tasks/1 and /tasks/2 share a series
+            route = getattr(scope.get("route"), "path", "unmatched")
+            http_requests.inc((method, route, str(status_code)))
+            http_duration.observe((method, route), elapsed)
+            http_response_size.observe((route,), size)
+            db_queries_per_request.observe((route,), stats[0])
+            db_time_per_request.observe((route,), stats[1])
+
+app.add_middleware(MetricsMiddleware)  # added after (= outside) compression, so sizes are what goes on the wire
+
+def metrics_snapshot() -> dict:
+    for field, value in pool_stats.snapshot(engine.sync_engine.pool).items():
+        pool_gauges.set((field,), value)
+    return {metric.name: [[list(labels), value] for labels, value in metric.values.items()] for metric in METRICS}
+
+def write_metrics_snapshot() -> None:
+    path = os.path.join(METRICS_DIR, f"metrics-{os.getpid()}.json")
+    with open(path + ".tmp", "w") as fh:
+        json.dump({"pid": os.getpid(), "metrics": metrics_snapshot()}, fh)
+    os.replace(path + ".tmp", path)  # readers never see a half-written file
+
+def pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+def collect_metrics() -> dict:
+    # metric name -> {label values tuple: value}, merged over all worker snapshots
+    if not METRICS_DIR:
+        return {name: {tuple(labels): value for labels, value in series} for name, series in metrics_snapshot().items()}
+    write_metrics_snapshot()
+    kinds = {metric.name: metric.kind for metric in METRICS}
+    merged: dict = {metric.name: {} for metric in METRICS}
+    for filename in os.listdir(METRICS_DIR):
+        if not (filename.startswith("metrics-") and filename.endswith(".json")):
+            continue
+        try:
+            with open(os.path.join(METRICS_DIR, filename)) as fh:
+                snapshot = json.load(fh)
+        except (OSError, ValueError):
+            continue
+        alive = pid_alive(snapshot["pid"])
+        for name, series in snapshot["metrics"].items():
+            if name not in merged or (kinds[name] == "gauge" and not alive):
+                continue
+            for labels, value in series:
+                key = tuple(labels)
+                current = merged[name].get(key)
+                if current is None:
+                    merged[name][key] = value
+                elif isinstance(value, list):
+                    merged[name][key] = [a + b for a, b in zip(current, value)]
+                else:
+                    merged[name][key] = current + value
+    return merged
+
+def escape_label(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def format_labels(names: tuple, values: tuple, extra: str = "") -> str:
+    pairs = [f'{name}="{escape_label(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+def render_metrics(merged: dict) -> str:
+    lines = []
+    for metric in METRICS:
+        lines.append(f"# HELP {metric.name} {metric.help_text}")
+        lines.append(f"# TYPE {metric.name} {metric.kind}")
+        for labels, value in sorted(merged[metric.name].items()):
+            if metric.kind != "histogram":
+                lines.append(f"{metric.name}{format_labels(metric.labelnames, labels)} {value}")
+                continue
+            cumulative = 0
+            for bound, count in zip(metric.buckets + ("+Inf",), value[:-1]):
+                cumulative += count
+                le = f'le="{bound}"'
+                lines.append(f"{metric.name}_bucket{format_labels(metric.labelnames, labels, le)} {cumulative}")
+            lines.append(f"{metric.name}_sum{format_labels(metric.labelnames, labels)} {value[-1]}")
+            lines.append(f"{metric.name}_count{format_labels(metric.labelnames, labels)} {cumulative}")
+    return "\n".join(lines) + "\n"
+
+class MetricsFlusher:
+    # background loop started with the app when METRICS_DIR is set
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        if METRICS_DIR and self.interval > 0:
+            os.makedirs(METRICS_DIR, exist_ok=True)
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+            write_metrics_snapshot()
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                write_metrics_snapshot()
+            except OSError:
+                pass  # e.g. directory removed, try again next round
+
+metrics_flusher = MetricsFlusher(METRICS_FLUSH_SECONDS)
+####################################################################
+# Query profiler (debug mode, off by default)
+#   QUERY_PROFILE=1                   profile every request
+#   QUERY_PROFILE_SLOW_MS             statements slower than this are flagged (default 100)
+#   QUERY_PROFILE_REPEAT_THRESHOLD    the same SELECT this many times in one request is flagged
+#                                     as a likely N+1, e.g. lazy Task.owner loads in a loop (default 5)
+# Each profiled request collects every SQL statement with its timing (fed by after_cursor_execute
+# above) and groups them by statement text, with IN (...) / VALUES lists collapsed.
+# The response gets a Server-Timing header (db + app time, shown by browser devtools), and one JSON
+# log record is written to the "main.profiler" logger: WARNING when something was flagged, INFO otherwise.
+####################################################################
+import logging
+
+QUERY_PROFILE = os.getenv("QUERY_PROFILE", "").lower() in ("1", "true", "on")
+QUERY_PROFILE_SLOW_MS = float(os.getenv("QUERY_PROFILE_SLOW_MS", "100"))
+QUERY_PROFILE_REPEAT_THRESHOLD = int(os.getenv("QUERY_PROFILE_REPEAT_THRESHOLD", "5"))
+PLACEHOLDER_TUPLE = r"\(\s*(?:\?|%s|\$\d+|:\w+)(?:\s*,\s*(?:\?|%s|\$\d+|:\w+))*\s*\)"  # (?, ?, ...) in any paramstyle
+PARAMETER_LIST = re.compile(rf"{PLACEHOLDER_TUPLE}(?:\s*,\s*{PLACEHOLDER_TUPLE})*")  # IN lists and multi-row VALUES
+
+profiler_log = logging.getLogger("main.profiler")
+
+def normalize_statement(statement: str) -> str:
+    return PARAMETER_LIST.sub("(...)", " ".join(statement.split()))
+
+def query_profile_report(queries: list) -> dict:
+    groups: dict = {}
+    for statement, elapsed in queries:
+        group = groups.setdefault(normalize_statement(statement), [0, 0.0])
+        group[0] += 1
+        group[1] += elapsed
+    repeated = sorted(
+        ({"statement": statement, "count": count, "total_ms": round(total * 1000, 3)} for statement, (count, total) in groups.items() if count > 1),
+        key=lambda group: -group["count"],
+    )
+    return {
+        "queries": len(queries),
+        "db_ms": round(sum(elapsed for _, elapsed in queries) * 1000, 3),
+        "repeated": repeated,
+        "n_plus_one": [group for group in repeated if group["count"] >= QUERY_PROFILE_REPEAT_THRESHOLD and group["statement"].lstrip().upper().startswith("SELECT")],
+        "slow": [
+            {"statement": normalize_statement(statement), "ms": round(elapsed * 1000, 3)}
+            for statement, elapsed in queries if elapsed * 1000 >= QUERY_PROFILE_SLOW_MS
+        ],
+    }
+
+class QueryProfilerMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        queries: list = []
+        request_query_profile.set(queries)
+        started = time.perf_counter()
+        status_code = 500
+
+        async def send_with_timing(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                # queries of a streamed body run after this point and only show up in the log record
+                db_ms = sum(elapsed for _, elapsed in queries) * 1000
+                app_ms = (time.perf_counter() - started) * 1000 - db_ms
+                MutableHeaders(scope=message).append("Server-Timing", f'db;dur={db_ms:.3f};desc="{len(queries)} queries", app;dur={app_ms:.3f}')
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            report = query_profile_report(queries)
+            record = {
+                "method": scope["method"],
+                "path": scope["path"],
+                "route": getattr(scope.get("route"), "path", "unmatched"),
+                "status": status_code,
+                "duration_ms": round((time.perf_counter() - started) * 1000, 3),
+                **report,
+            }
+            flagged = report["n_plus_one"] or report["slow"]
+            profiler_log.log(logging.WARNING if flagged else logging.INFO, json.dumps(record))
+
+if QUERY_PROFILE:
+    if not profiler_log.handlers:
+        profiler_log.addHandler(logging.StreamHandler())
+    profiler_log.setLevel(logging.INFO)
+    app.add_middleware(QueryProfilerMiddleware)
+
+####################################################################
+# Request recording (off by default)
+#   REQUEST_RECORD_PATH      JSONL file to append to. "{pid}" is replaced by the worker pid, so with
+#                            serve.py --workers N every worker gets its own file (traces/requests-{pid}.jsonl)
+#   REQUEST_RECORD_SAMPLE    fraction of requests to record (default 1.0)
+#   REQUEST_RECORD_MAX_BODY  longer request bodies are cut and marked body_truncated (default 64 KiB)
+# One line per request: ts, method, path, query, route, content_type, body, subject (the JWT sub,
+# never the token itself), status, duration_ms, response_bytes. Bodies of /auth/* requests carry
+# passwords and are never written. benchmarks/replay.py plays these files back against the app.
+####################################################################
+import random
+
+REQUEST_RECORD_PATH = os.getenv("REQUEST_RECORD_PATH", "")
+REQUEST_RECORD_SAMPLE = float(os.getenv("REQUEST_RECORD_SAMPLE", "1"))
+REQUEST_RECORD_MAX_BODY = int(os.getenv("REQUEST_RECORD_MAX_BODY", str(64 * 1024)))
+
+class RequestRecorder:
+    # buffered appends from the event loop thread; a line is ~200 bytes, so writes rarely hit the disk
+    def __init__(self, path: str):
+        self.path = path
+        self._file = None
+
+    def write(self, record: dict) -> None:
+        if self._file is None:
+            path = self.path.replace("{pid}", str(os.getpid()))
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            self._file = open(path, "a", encoding="utf-8")
+        self._file.write(json.dumps(record) + "\n")
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+request_recorder = RequestRecorder(REQUEST_RECORD_PATH)
+
+def auth_subject(headers: list) -> Optional[str]:
+    authorization = next((value.decode("latin-1") for name, value in headers if name == b"authorization"), "")
+    scheme, _, token = authorization.partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return None
+    try:
+        # straight jwt.decode, not decode_access_token: the recorder must not show up in token_cache hit/miss stats
+        return jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM]).get("sub")
+    except JWTError:
+        return None
+
+class RecordingMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or random.random() >= REQUEST_RECORD_SAMPLE:
+            return await self.app(scope, receive, send)
+        body = bytearray()
+        truncated = False
+        status_code = 500
+        size = 0
+
+        async def receive_recorded():
+            nonlocal truncated
+            message = await receive()
+            if message["type"] == "http.request":
+                chunk = message.get("body", b"")
+                room = REQUEST_RECORD_MAX_BODY - len(body)
+                truncated = truncated or len(chunk) > room
+                body.extend(chunk[:max(room, 0)])
+            return message
+
+        async def send_recorded(message):
+            nonlocal status_code, size
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            await send(message)
+
+        ts = time.time()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive_recorded, send_recorded)
+        finally:
+            redacted = scope["path"].startswith("/auth/")
+            request_recorder.write({
+                "ts": round(ts, 6),
+                "method": scope["method"],
+                "path": scope["path"],
+                "query": scope["query_string"].decode("latin-1"),
+                "route": getattr(scope.get("route"), "path", None),
+                "content_type": next((value.decode("latin-1") for name, value in scope["headers"] if name == b"content-type"), None),
+                "body": None if redacted else body.decode("utf-8", errors="replace"),
+                "body_truncated": truncated and not redacted,
+                "subject": auth_subject(scope["headers"]),
+                "status": status_code,
+                "duration_ms": round((time.perf_counter() - started) * 1000, 3),
+                "response_bytes": size,
+            })
+
+if REQUEST_RECORD_PATH:
+    app.add_middleware(RecordingMiddleware)
 #################################################################
 #stratup: create tables
 # what does it do on startup
@@ -347,26 +1511,59 @@ app.add_middleware(
 #In this case, it calls Base.metadata.create_all(bind=engine) to create all the database tables defined in the ORM models if they do not already exist.
 #This ensures that the necessary database schema is set up and ready for use when the application starts. if the tables already exist, this operation will have no effect.
 #################################################################
+def create_schema(connection):
+    Base.metadata.create_all(bind=connection)
+    # create_all skips tables that already exist, so make sure indexes added later are there too
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=connection, checkfirst=True)
+    backfill_user_task_rows(connection)
+    create_search_index(connection)
+
 @app.on_event("startup")
-def on_startup():
-    Base.metadata.create_all(bind=engine)
+async def on_startup():
+    # DDL helpers are sync-only, run_sync hands them a regular Connection
+    async with engine.begin() as conn:
+        await conn.run_sync(create_schema)
+    password_hasher.start()
+    tombstone_compactor.start()
+    metrics_flusher.start()
+
+@app.on_event("shutdown")
+async def on_shutdown():
+    await tombstone_compactor.stop()
+    await metrics_flusher.stop()
+    request_recorder.close()
+    password_hasher.shutdown()
+    await engine.dispose()
 
 ###################################################################
 #Root and health check endpoints
 ###################################################################
 @app.get("/", summary="Welcome Endpoint")
-def root():
+async def root():
     return {"message": "Welcome to the ToDO API built with FastAPI and SQLAlchemy!"}
 
 @app.get("/health", summary="Health Check Endpoint")
-def health_check(db: Session = Depends(get_db)):
+async def health_check(db: AsyncSession = Depends(get_db)):
     # Simple DB query to ensure connectivity
     try:
-        db.execute(text("SELECT 1"))
+        await db.execute(text("SELECT 1"))
         return {"status": "ok", "database": "connected"}
     except Exception as e:
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Database connection error")
 
+@app.get("/health/caches", summary="In-process cache statistics")
+async def cache_stats():
+    return {"user_cache": user_cache.stats(), "token_cache": token_cache.stats(), "compression_cache": compression_cache.stats()}
+
+@app.get("/metrics", summary="Prometheus metrics", response_class=Response)
+async def metrics():
+    return Response(content=render_metrics(collect_metrics()), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+@app.get("/metrics/pool", summary="Database connection pool statistics")
+async def pool_metrics():
+    return pool_stats.snapshot(engine.sync_engine.pool)
 
 ####################################################################
 # Auth endpoints (Lesson 2)
@@ -374,31 +1571,23 @@ def health_check(db: Session = Depends(get_db)):
 # - /auth/login    : validate credentials and return a placeholder token
 ####################################################################
 # Register new user
+# password hashing is awaited on the process pool (see PasswordHasher)
 @app.post("/auth/register", response_model=UserResponse, status_code=status.HTTP_201_CREATED, summary="Register a new user")
-def register_user(user_in: UserCreate, db: Session = Depends(get_db)):
+async def register_user(user_in: UserCreate, db: AsyncSession = Depends(get_db)):
     # Check if username or email already exists
-    if get_user_by_username(db, user_in.username):
+    if await get_user_by_username(db, user_in.username):
         raise HTTPException(status_code= status.HTTP_400_BAD_REQUEST, detail="Username already registered")
-    if get_user_by_email(db, user_in.email):
+    if await get_user_by_email(db, user_in.email):
         raise HTTPException(status_code= status.HTTP_400_BAD_REQUEST, detail="Email already registered")
     
-    # Create new user (storing raw password for Lesson 2)
-    hashed_password = get_password_hash(user_in.password)  # Hash the password before storing
-    user = User(
-        email= user_in.email,
-        username= user_in.username,
-        hashed_password= hashed_password
-    )
-    db.add(user)
-    db.commit()
-    db.refresh(user)
-    return user
+    hashed_password = await password_hasher.hash(user_in.password)  # Hash the password before storing
+    return await create_user(db, user_in.email, user_in.username, hashed_password)
 
 # Login user
 @app.post("/auth/login", response_model= UserLoginResponse,summary="Login and obtain access token")
-def login_user(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
-    user= get_user_by_username(db, form_data.username)
-    if not user or not verify_password(form_data.password, user.hashed_password):
+async def login_user(form_data: OAuth2PasswordRequestForm = Depends(), db: AsyncSession = Depends(get_db)):
+    user= await get_user_by_username(db, form_data.username)
+    if not user or not await password_hasher.verify(form_data.password, user.hashed_password):
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid username or password")
     
     access_token = create_access_token(data={"sub": user.username})
@@ -410,7 +1599,7 @@ def login_user(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = D
 #####################################################################
 # Create Task
 @app.post("/tasks/", response_model=TaskResponse, status_code=status.HTTP_201_CREATED, summary="Create a new task")
-def create_task(task_in: TaskCreate, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+async def create_task(task_in: TaskCreate, db: AsyncSession = Depends(get_db), current_user: CurrentUser = Depends(get_current_user)):
     task = Task(
         title= task_in.title,
         description= task_in.description,
@@ -421,63 +1610,837 @@ def create_task(task_in: TaskCreate, db: Session = Depends(get_db), current_user
     )
 
     db.add(task)
-    db.commit()
-    db.refresh(task)
-    return task
+    await adjust_task_count(db, current_user.id, 1)
+    await bump_task_list_version(db, current_user.id)
+    await db.commit()
+    await db.refresh(task)
+    return json_response(TaskResponse.model_validate(task), status_code=status.HTTP_201_CREATED)
+
+####################################################################
+# Bulk task creation
+# One transaction and one multi-row INSERT ... RETURNING per request (SQLite 3.35+ / Postgres),
+# instead of a commit + refresh round-trip per task.
+#   POST /tasks/bulk         JSON array of TaskCreate
+#   POST /tasks/bulk/ndjson  one TaskCreate JSON object per line, parsed as the body streams in
+# BULK_MAX_ITEMS caps the batch size (413 when exceeded).
+# Registered before /tasks/{task_id} so "bulk" is not taken for a task id.
+####################################################################
+BULK_MAX_ITEMS = int(os.getenv("BULK_MAX_ITEMS", "1000"))
+
+async def insert_tasks(db: AsyncSession, owner_id: int, items: List[TaskCreate]) -> List[Task]:
+    if not items:
+        return []
+    rows = [{**item.model_dump(), "owner_id": owner_id} for item in items]
+    # RETURNING row order is not guaranteed; ids are assigned in VALUES order, so sort on them to match the request.
+    # (sort_by_parameter_order=True would do the same but makes SQLite fall back to one INSERT per row)
+    tasks = sorted((await db.scalars(insert(Task).returning(Task), rows)).all(), key=lambda task: task.id)
+    await adjust_task_count(db, owner_id, len(tasks))
+    await bump_task_list_version(db, owner_id)
+    return tasks
+
+async def iter_ndjson_lines(request: Request, skip_blank: bool = True, max_line_bytes: Optional[int] = None):
+    # yields (line_number, raw line) as chunks arrive; blank lines are skipped unless skip_blank=False.
+    # With max_line_bytes a longer line is yielded as None and its bytes are dropped as they arrive,
+    # so a body without newlines cannot grow the buffer without bound.
+    buffer = b""
+    line_number = 0
+    oversized = False
+    async for chunk in request.stream():
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            line_number += 1
+            if oversized or (max_line_bytes is not None and len(line) > max_line_bytes):
+                oversized = False
+                yield line_number, None
+            elif line.strip() or not skip_blank:
+                yield line_number, line
+        if max_line_bytes is not None and len(buffer) > max_line_bytes:
+            oversized, buffer = True, b""
+    if oversized:
+        yield line_number + 1, None
+    elif buffer.strip():
+        yield line_number + 1, buffer
+
+def check_bulk_size(count: int) -> None:
+    if count > BULK_MAX_ITEMS:
+        raise HTTPException(status_code=status.HTTP_413_CONTENT_TOO_LARGE, detail=f"At most {BULK_MAX_ITEMS} tasks per request")
+
+@app.post("/tasks/bulk", response_model=List[TaskResponse], status_code=status.HTTP_201_CREATED, summary="Create many tasks in one request")
+async def create_tasks_bulk(tasks_in: List[TaskCreate], db: AsyncSession = Depends(get_db), current_user: CurrentUser = Depends(get_current_user)):
+    check_bulk_size(len(tasks_in))
+    tasks = await insert_tasks(db, current_user.id, tasks_in)
+    await db.commit()
+    return json_response(TASK_LIST_ADAPTER.validate_python(tasks, from_attributes=True), status_code=status.HTTP_201_CREATED)
+
+@app.post("/tasks/bulk/ndjson", response_model=List[TaskResponse], status_code=status.HTTP_201_CREATED, summary="Create many tasks from an NDJSON body")
+async def create_tasks_bulk_ndjson(request: Request, db: AsyncSession = Depends(get_db), current_user: CurrentUser = Depends(get_current_user)):
+    items: List[TaskCreate] = []
+    async for line_number, line in iter_ndjson_lines(request):
+        check_bulk_size(len(items) + 1)
+        try:
+            items.append(TaskCreate.model_validate_json(line))
+        except ValidationError as e:
+            raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_CONTENT, detail={"line": line_number, "errors": e.errors(include_url=False)})
+    tasks = await insert_tasks(db, current_user.id, items)
+    await db.commit()
+    return json_response(TASK_LIST_ADAPTER.validate_python(tasks, from_attributes=True), status_code=status.HTTP_201_CREATED)
+
+####################################################################
+# Bulk update / complete / delete
+# Each request is a single set-based UPDATE/DELETE ... WHERE owner_id=? AND <selection>, so clearing
+# 10k tasks is one statement. The response only carries the affected row count.
+####################################################################
+def task_filter_conditions(f: TaskFilter) -> list:
+    conditions = []
+    if f.status is not None:
+        conditions.append(Task.status == f.status)
+    if f.priority is not None:
+        conditions.append(Task.priority == f.priority)
+    if f.is_completed is not None:
+        conditions.append(Task.is_completed == f.is_completed)
+    if f.due_after is not None:
+        conditions.append(Task.due_date >= f.due_after)
+    if f.due_before is not None:
+        conditions.append(Task.due_date < f.due_before)
+    return conditions
+
+def selection_conditions(selection: TaskSelection, owner_id: int) -> list:
+    conditions = [Task.owner_id == owner_id]
+    if selection.ids is not None:
+        check_bulk_size(len(selection.ids))
+        conditions.append(Task.id.in_(selection.ids))
+    if selection.filter is not None:
+        conditions.extend(task_filter_conditions(selection.filter))
+    return conditions
+
+async def bulk_update_tasks(db: AsyncSession, selection: TaskSelection, owner_id: int, values: dict) -> int:
+    # updated_at is filled in by the column's onupdate
+    result = await db.execute(
+        update(Task).where(*selection_conditions(selection, owner_id)).values(**values).execution_options(synchronize_session=False)
+    )
+    if result.rowcount:
+        await bump_task_list_version(db, owner_id)
+    await db.commit()
+    return result.rowcount
+
+@app.post("/tasks/bulk/update", response_model=BulkResult, summary="Update many tasks at once")
+async def update_tasks_bulk(bulk_in: TaskBulkUpdate, db: AsyncSession = Depends(get_db), current_user: CurrentUser = Depends(get_current_user)):
+    values = bulk_in.changes.model_dump(exclude_none=True)
+    if not values:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="No changes given")
+    return BulkResult(affected=await bulk_update_tasks(db, bulk_in, current_user.id, values))
+
+@app.post("/tasks/bulk/complete", response_model=BulkResult, summary="Mark many tasks as completed")
+async def complete_tasks_bulk(selection: TaskSelection, db: AsyncSession = Depends(get_db), current_user: CurrentUser = Depends(get_current_user)):
+    values = {"is_completed": True, "status": TaskStatus.COMPLETED}
+    return BulkResult(affected=await bulk_update_tasks(db, selection, current_user.id, values))
+
+@app.post("/tasks/bulk/delete", response_model=BulkResult, summary="Delete many tasks at once")
+async def delete_tasks_bulk(selection: TaskSelection, db: AsyncSession = Depends(get_db), current_user: CurrentUser = Depends(get_current_user)):
+    deleted_ids = (await db.scalars(
+        delete(Task).where(*selection_conditions(selection, current_user.id)).returning(Task.id).execution_options(synchronize_session=False)
+    )).all()
+    await add_tombstones(db, current_user.id, deleted_ids)
+    await adjust_task_count(db, current_user.id, -len(deleted_ids))
+    if deleted_ids:
+        await bump_task_list_version(db, current_user.id)
+    await db.commit()
+    return BulkResult(affected=len(deleted_ids))
+
+####################################################################
+# Task counter helpers (see UserTaskCount)
+####################################################################
+TASK_COUNT_BACKFILL = text(
+    "INSERT INTO user_task_counts (user_id, task_count) "
+    "SELECT users.id, (SELECT count(*) FROM tasks WHERE tasks.owner_id = users.id) FROM users "
+    "WHERE NOT EXISTS (SELECT 1 FROM user_task_counts WHERE user_task_counts.user_id = users.id) "
+    "ON CONFLICT (user_id) DO NOTHING"
+)
+TASK_LIST_VERSION_BACKFILL = text(
+    "INSERT INTO user_task_list_versions (user_id, version) "
+    "SELECT users.id, 0 FROM users "
+    "WHERE NOT EXISTS (SELECT 1 FROM user_task_list_versions WHERE user_task_list_versions.user_id = users.id) "
+    "ON CONFLICT (user_id) DO NOTHING"
+)
+
+def backfill_user_task_rows(connection) -> None:
+    # counter / list version rows for users created before those tables existed, run once by create_schema
+    # at startup. Doing this lazily inside a request could race with an uncommitted create/delete on Postgres:
+    # its adjust_task_count updates no row yet while the backfill's count(*) cannot see the task, and the
+    # count would stay wrong for good. New users get their rows from create_user.
+    connection.execute(TASK_COUNT_BACKFILL)
+    connection.execute(TASK_LIST_VERSION_BACKFILL)
+
+async def get_task_count(db: AsyncSession, user_id: int) -> int:
+    return await db.scalar(select(UserTaskCount.task_count).where(UserTaskCount.user_id == user_id)) or 0
+
+async def task_list_etag(db: AsyncSession, user_id: int, query: str) -> str:
+    # per-user list version (see Conditional GETs): one row by primary key
+    version = await db.scalar(select(UserTaskListVersion.version).where(UserTaskListVersion.user_id == user_id)) or 0
+    tag = f"{user_id}|{version}|{query}"
+    return f'"{hashlib.sha256(tag.encode()).hexdigest()[:32]}"'
+
+async def adjust_task_count(db: AsyncSession, user_id: int, delta: int) -> None:
+    # atomic in-database increment, runs inside the caller's transaction (the row exists from create_user / startup backfill)
+    await db.execute(
+        update(UserTaskCount)
+        .where(UserTaskCount.user_id == user_id)
+        .values(task_count=UserTaskCount.task_count + delta)
+        .execution_options(synchronize_session=False)
+    )
+
+async def bump_task_list_version(db: AsyncSession, user_id: int) -> None:
+    # every write to a user's tasks calls this inside its transaction, so the change and the new list ETag commit together
+    await db.execute(
+        update(UserTaskListVersion)
+        .where(UserTaskListVersion.user_id == user_id)
+        .values(version=UserTaskListVersion.version + 1)
+        .execution_options(synchronize_session=False)
+    )
+
+####################################################################
+# Sorting + keyset (cursor) pagination helpers
+# sort is one of TASK_SORT_KEYS, "-" prefix = descending; id breaks ties so the order is total.
+# The cursor is the (sort value, id) of the last task on a page, base64 encoded so clients treat it as opaque.
+# Seeking with WHERE (value, id) < (?, ?) walks an (owner_id, value, id) index, so deep pages cost the same as page one.
+####################################################################
+TASK_SORT_KEYS = {"created_at": Task.created_at, "updated_at": Task.updated_at, "due_date": Task.due_date, "title": Task.title}
+TaskSort = Literal["created_at", "-created_at", "updated_at", "-updated_at", "due_date", "-due_date", "title", "-title"]
+# due_date can be NULL and NULLs cannot be compared in a keyset seek, so that sort pages with skip only
+KEYSET_SORT_KEYS = {"created_at", "updated_at", "title"}
+
+def encode_task_cursor(task: Task, sort_key: str) -> str:
+    value = getattr(task, sort_key)
+    raw = json.dumps([sort_key, value.isoformat() if isinstance(value, datetime) else value, task.id]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_task_cursor(cursor: str, sort_key: str) -> tuple:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        cursor_key, value, task_id = json.loads(raw)
+        if cursor_key != sort_key:
+            raise ValueError("cursor was issued for another sort")
+        if isinstance(TASK_SORT_KEYS[sort_key].type, DateTime):
+            value = datetime.fromisoformat(value)
+        return value, int(task_id)
+    except (ValueError, TypeError, KeyError):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+
+def task_list_query(conditions: list, sort: str, columns: List[str], cursor: Optional[str], skip: int, limit: int):
+    # the GET /tasks/ page query; benchmarks/check_query_plans.py plans exactly this statement
+    sort_key = sort.lstrip("-")
+    descending = sort.startswith("-")
+    column = TASK_SORT_KEYS[sort_key]
+    q = select(*(Task.__table__.c[name] for name in columns)).where(*conditions)
+    q = q.order_by(column.desc(), Task.id.desc()) if descending else q.order_by(column.asc(), Task.id.asc())
+    if cursor:
+        if sort_key not in KEYSET_SORT_KEYS:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Cursor pagination is not available for sort={sort}, use skip")
+        value, task_id = decode_task_cursor(cursor, sort_key)
+        position = tuple_(column, Task.id)
+        q = q.where(position < (value, task_id) if descending else position > (value, task_id))
+    else:
+        q = q.offset(skip)
+    # fetch one extra row to know whether another page exists
+    return q.limit(limit + 1)
+
+def parse_task_fields(fields: Optional[str]) -> set:
+    if not fields:
+        return set(TASK_FIELDS)
+    requested = {name.strip() for name in fields.split(",") if name.strip()}
+    unknown = requested - set(TASK_FIELDS)
+    if unknown:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Unknown task fields: {', '.join(sorted(unknown))}")
+    return requested
 
 #get list of tasks
+# - skip/limit: classic offset pagination (kept for compatibility)
+# - cursor: keyset pagination, pass next_cursor from the previous page (skip is ignored)
+# - include_total: set to false to skip the total lookup (infinite-scroll clients)
+# - status / priority / is_completed / due_after / due_before: server-side filters
+# - sort: one of TaskSort, default newest first
+# - fields: comma separated task fields to return, e.g. fields=id,title,status (default: all)
+# Responses carry an ETag; send it back as If-None-Match to get a 304 while nothing changed.
 @app.get("/tasks/",response_model=TaskListResponse, summary="Get a list of tasks")
-def get_tasks(skip: int = 0, limit: int = 10, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
-    q = db.query(Task).filter(Task.owner_id == current_user.id)
-    total = q.count()
-    tasks = q.order_by(Task.created_at.desc()).offset(skip).limit(limit).all()
+async def get_tasks(
+    request: Request,
+    skip: int = 0,
+    limit: int = 10,
+    cursor: Optional[str] = None,
+    include_total: bool = True,
+    status_filter: Optional[TaskStatus] = Query(None, alias="status"),
+    priority: Optional[TaskPriority] = None,
+    is_completed: Optional[bool] = None,
+    due_after: Optional[datetime] = None,
+    due_before: Optional[datetime] = None,
+    sort: TaskSort = "-created_at",
+    fields: Optional[str] = None,
+    db: AsyncSession = Depends(get_db),
+    current_user: CurrentUser = Depends(get_current_user),
+):
+    requested = parse_task_fields(fields)
+    etag = await task_list_etag(db, current_user.id, request.url.query)
+    if is_not_modified(request, etag):
+        return not_modified_response(etag)
+    task_filter = TaskFilter(status=status_filter, priority=priority, is_completed=is_completed, due_after=due_after, due_before=due_before)
+    conditions = [Task.owner_id == current_user.id, *task_filter_conditions(task_filter)]
+    if not include_total:
+        total = None
+    elif len(conditions) == 1:
+        total = await get_task_count(db, current_user.id)
+    else:
+        # filtered totals cannot come from the per-user counter
+        total = await db.scalar(select(func.count()).select_from(Task).where(*conditions))
+
+    sort_key = sort.lstrip("-")
+    # id and the sort column are always selected for the cursor, and dropped again on output if not requested
+    selected = [name for name in TASK_FIELDS if name in requested or name in ("id", sort_key)]
+    hidden = {name for name in selected if name not in requested}
+    skip = 0 if cursor else skip
+    rows = (await db.execute(task_list_query(conditions, sort, selected, cursor, skip, limit))).all()
+    has_more = limit > 0 and len(rows) > limit
+    next_cursor = encode_task_cursor(rows[limit - 1], sort_key) if has_more and sort_key in KEYSET_SORT_KEYS else None
+
+    page = TaskRowListResponse(tasks=[row._asdict() for row in rows[:limit]], total=total, skip=skip, limit=limit, next_cursor=next_cursor)
+    response = json_response(page, exclude={"tasks": {"__all__": hidden}} if hidden else None)
+    response.headers.update(validator_headers(etag))
+    return response
+
+####################################################################
+# Full-text search over title/description
+# SQLite: external-content FTS5 table tasks_fts, kept in sync by triggers on tasks, so every write
+#         path (single, bulk, RETURNING) updates the index without extra application code.
+#         owner_id is indexed as a column too and every search matches owner_id:"<id>" AND (...),
+#         so FTS5 intersects with the caller's doclist instead of looking up every user's matches.
+# Postgres: composite GIN index on (owner_id, to_tsvector(title || description)) through btree_gin,
+#         so the owner and the words are answered by one index; Postgres maintains it itself.
+# Results are ranked (bm25 / ts_rank) and paginated with skip/limit.
+####################################################################
+SEARCH_LANGUAGE = "english"
+TSVECTOR_SQL = f"to_tsvector('{SEARCH_LANGUAGE}', coalesce(tasks.title, '') || ' ' || coalesce(tasks.description, ''))"
+
+SQLITE_SEARCH_DDL = [
+    # databases from before owner_id was indexed: drop the old table and triggers, they are rebuilt below
+    "DROP TRIGGER IF EXISTS tasks_fts_insert",
+    "DROP TRIGGER IF EXISTS tasks_fts_delete",
+    "DROP TRIGGER IF EXISTS tasks_fts_update",
+    "DROP TABLE IF EXISTS tasks_fts",
+    "CREATE VIRTUAL TABLE tasks_fts USING fts5(title, description, owner_id, content='tasks', content_rowid='id')",
+    "INSERT INTO tasks_fts(tasks_fts) VALUES ('rebuild')",  # index rows that existed before the table
+    """CREATE TRIGGER tasks_fts_insert AFTER INSERT ON tasks BEGIN
+        INSERT INTO tasks_fts(rowid, title, description, owner_id) VALUES (new.id, new.title, new.description, new.owner_id);
+    END""",
+    """CREATE TRIGGER tasks_fts_delete AFTER DELETE ON tasks BEGIN
+        INSERT INTO tasks_fts(tasks_fts, rowid, title, description, owner_id) VALUES ('delete', old.id, old.title, old.description, old.owner_id);
+    END""",
+    """CREATE TRIGGER tasks_fts_update AFTER UPDATE OF title, description, owner_id ON tasks BEGIN
+        INSERT INTO tasks_fts(tasks_fts, rowid, title, description, owner_id) VALUES ('delete', old.id, old.title, old.description, old.owner_id);
+        INSERT INTO tasks_fts(rowid, title, description, owner_id) VALUES (new.id, new.title, new.description, new.owner_id);
+    END""",
+]
+# bm25 weights for (title, description, owner_id): the owner token matches every result, it must not rank
+SQLITE_SEARCH_RANK = "bm25(tasks_fts, 1.0, 1.0, 0.0)"
+
+def create_search_index(connection) -> None:
+    if connection.dialect.name == "sqlite":
+        ddl = connection.exec_driver_sql("SELECT sql FROM sqlite_master WHERE name = 'tasks_fts'").scalar()
+        if ddl is None or "owner_id" not in ddl:
+            for statement in SQLITE_SEARCH_DDL:
+                connection.exec_driver_sql(statement)
+    elif connection.dialect.name == "postgresql":
+        try:
+            # btree_gin lets a GIN index hold the plain owner_id column next to the tsvector
+            with connection.begin_nested():
+                connection.exec_driver_sql("CREATE EXTENSION IF NOT EXISTS btree_gin")
+        except DBAPIError:
+            # extension not installed / no privilege to create it: fall back to the tsvector-only index
+            connection.exec_driver_sql(f"CREATE INDEX IF NOT EXISTS ix_tasks_fts ON tasks USING GIN (({TSVECTOR_SQL}))")
+            return
+        connection.exec_driver_sql(f"CREATE INDEX IF NOT EXISTS ix_tasks_owner_fts ON tasks USING GIN (owner_id, ({TSVECTOR_SQL}))")
+        connection.exec_driver_sql("DROP INDEX IF EXISTS ix_tasks_fts")
+
+def fts5_query(q: str) -> str:
+    # quote every word so user input cannot inject FTS5 syntax; words are ANDed, the last one prefix-matched
+    words = re.findall(r"\w+", q)
+    return " ".join(f'"{word}"' for word in words) + ("*" if words else "")
+
+@app.get("/tasks/search", response_model=TaskListResponse, summary="Full-text search over task title and description")
+async def search_tasks(q: str = Query(..., min_length=1, max_length=200), skip: int = 0, limit: int = 10, include_total: bool = False, db: AsyncSession = Depends(get_db), current_user: CurrentUser = Depends(get_current_user)):
+    dialect = db.bind.dialect.name
+    if dialect == "sqlite":
+        match = fts5_query(q)
+        if not match:
+            return json_response(TaskListResponse(tasks=[], total=0 if include_total else None, skip=skip, limit=limit))
+        # the owner phrase is an exact integer token in the owner_id column; user words only match title/description
+        match = f'owner_id:"{current_user.id}" AND {{title description}} : ({match})'
+        tasks_fts = table("tasks_fts", column("rowid"))
+        base = select(Task).join(tasks_fts, tasks_fts.c.rowid == Task.id).where(text("tasks_fts MATCH :match").bindparams(match=match))
+        rank = text(SQLITE_SEARCH_RANK)
+    elif dialect == "postgresql":
+        document = literal_column(TSVECTOR_SQL)
+        query = func.websearch_to_tsquery(SEARCH_LANGUAGE, q)
+        base = select(Task).where(document.op("@@")(query))
+        rank = func.ts_rank(document, query).desc()
+    else:
+        raise HTTPException(status_code=status.HTTP_501_NOT_IMPLEMENTED, detail=f"Search is not available on {dialect}")
+
+    base = base.where(Task.owner_id == current_user.id)
+    total = await db.scalar(select(func.count()).select_from(base.subquery())) if include_total else None
+    tasks = (await db.scalars(base.order_by(rank, Task.id.desc()).offset(skip).limit(limit))).all()
+    # ranked results page with skip only, so no next_cursor
+    return json_response(TaskListResponse(tasks=tasks[:limit], total=total, skip=skip, limit=limit))
+
+####################################################################
+# Streaming export
+#   GET /tasks/export?format=ndjson|csv&fields=...&compress=true
+# Rows are read through a server-side cursor (stream + yield_per) and written out one
+# partition at a time, so memory stays flat whatever the number of tasks.
+# compress=true gzips the stream on the fly (Content-Encoding: gzip).
+# The generator opens its own session: the stream keeps running after the handler has returned.
+####################################################################
+EXPORT_CHUNK_SIZE = int(os.getenv("EXPORT_CHUNK_SIZE", "1000"))
+EXPORT_MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+def csv_value(value):
+    if value is None:
+        return ""
+    if isinstance(value, PyEnum):
+        return value.value
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+async def iter_task_export(owner_id: int, names: list, export_format: str):
+    # (owner_id, created_at, id) order walks ix_tasks_owner_created_id, no sort step
+    q = (
+        select(*(Task.__table__.c[name] for name in names))
+        .where(Task.owner_id == owner_id)
+        .order_by(Task.created_at, Task.id)
+        .execution_options(yield_per=EXPORT_CHUNK_SIZE)
+    )
+    if export_format == "csv":
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(names)
+        yield buffer.getvalue().encode()
+    async with SessionLocal() as db:
+        result = await db.stream(q)
+        async for rows in result.partitions():
+            if export_format == "csv":
+                buffer.seek(0)
+                buffer.truncate()
+                writer.writerows([csv_value(value) for value in row] for row in rows)
+                yield buffer.getvalue().encode()
+            else:
+                yield b"".join(to_json(row._asdict()) + b"\n" for row in rows)
+
+async def gzip_stream(chunks):
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits=31 -> gzip container
+    async for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+@app.get("/tasks/export", summary="Stream all tasks as NDJSON or CSV")
+async def export_tasks(
+    export_format: Literal["ndjson", "csv"] = Query("ndjson", alias="format"),
+    fields: Optional[str] = None,
+    compress: bool = False,
+    current_user: CurrentUser = Depends(get_current_user),
+):
+    requested = parse_task_fields(fields)
+    names = [name for name in TASK_FIELDS if name in requested]
+    body = iter_task_export(current_user.id, names, export_format)
+    headers = {"Content-Disposition": f'attachment; filename="tasks.{export_format}"'}
+    if compress:
+        body = gzip_stream(body)
+        headers["Content-Encoding"] = "gzip"
+    return StreamingResponse(body, media_type=EXPORT_MEDIA_TYPES[export_format], headers=headers)
+
+####################################################################
+# Streaming import
+#   POST /tasks/import?format=ndjson|csv&chunk_size=500
+# The body is parsed line by line as it arrives. Each record is validated with TaskCreate.
+# Valid rows are inserted and committed every chunk_size rows. Invalid lines are skipped
+# and reported with their line number, so one bad row does not cost the whole migration.
+# Backpressure: the next body chunk is only read once the current batch is written,
+# so memory is bounded by chunk_size rather than by the upload size.
+# CSV needs a header row with TaskCreate field names; unknown columns (e.g. id from
+# GET /tasks/export) are ignored and empty cells fall back to the defaults.
+####################################################################
+IMPORT_CHUNK_SIZE = int(os.getenv("IMPORT_CHUNK_SIZE", "500"))
+IMPORT_MAX_ERRORS = int(os.getenv("IMPORT_MAX_ERRORS", "100"))
+IMPORT_MAX_RECORD_BYTES = int(os.getenv("IMPORT_MAX_RECORD_BYTES", str(1024 * 1024)))  # per NDJSON line / CSV record
+
+def csv_line_ends_quoted(line: str, in_quotes: bool) -> bool:
+    # whether a CSV record is still inside a quoted field at the end of this line, by the rules csv.reader
+    # applies with the default dialect: a quote opens a quoted field only at the start of a field ("5\" screen"
+    # is a literal quote), "" inside a quoted field is an escaped quote. Only looks at the quotes, so lines
+    # without any cost one find().
+    position = 0
+    while True:
+        quote = line.find('"', position)
+        if quote < 0:
+            return in_quotes
+        if in_quotes:
+            if line.startswith('"', quote + 1):
+                position = quote + 2  # escaped quote
+                continue
+            in_quotes = False
+        elif quote == 0 or (quote > position and line[quote - 1] == ","):
+            in_quotes = True
+        position = quote + 1
+
+class LineFeed:
+    # csv.reader input that can run dry and be refilled: the reader keeps the same iterator for the whole body
+    def __init__(self):
+        self.lines = deque()
+
+    def __iter__(self):
+        return self
+
+    def __next__(self) -> str:
+        if not self.lines:
+            raise StopIteration
+        return self.lines.popleft()
+
+async def iter_csv_records(request: Request):
+    # yields (line_number, header, values, errors) with errors set instead of values for a broken record.
+    # One csv.reader parses the whole body and handles quoted newlines itself; it is fed a record's lines
+    # once csv_line_ends_quoted says the record is complete, so it never waits on lines not received yet.
+    # Lines and records are capped at IMPORT_MAX_RECORD_BYTES; an oversized record is skipped as a line error.
+    header = None
+    feed = LineFeed()
+    reader = csv.reader(feed)
+    start, size, in_quotes, too_long, blank = 0, 0, False, False, True
+    async for line_number, line in iter_ndjson_lines(request, skip_blank=False, max_line_bytes=IMPORT_MAX_RECORD_BYTES):
+        if not in_quotes:
+            start, size, too_long, blank = line_number, 0, False, True
+        if line is None:
+            too_long = True  # the line's bytes are gone, so its quotes are unknown: the record ends with it
+            in_quotes = False
+        else:
+            text = line.decode("utf-8-sig" if header is None else "utf-8", errors="replace")
+            in_quotes = csv_line_ends_quoted(text, in_quotes)
+            size += len(line)
+            too_long = too_long or size > IMPORT_MAX_RECORD_BYTES
+            blank = blank and not text.strip()
+            feed.lines.append(text + "\n")
+            if too_long:
+                feed.lines.clear()
+        if in_quotes or (blank and not too_long):
+            if not in_quotes:
+                feed.lines.clear()
+            continue
+        if too_long:
+            yield start, header, None, [{"type": "record_too_long", "msg": f"Record longer than {IMPORT_MAX_RECORD_BYTES} bytes"}]
+            continue
+        try:
+            values = next(reader)
+        except csv.Error as e:
+            yield start, header, None, [{"type": "csv_error", "msg": str(e)}]
+            continue
+        finally:
+            feed.lines.clear()
+        if header is None:
+            header = [name.strip() for name in values]
+        else:
+            yield start, header, values, None
+    if in_quotes and feed.lines and header is not None:  # unterminated quote at the end of the body
+        try:
+            yield start, header, next(reader), None
+        except csv.Error as e:
+            yield start, header, None, [{"type": "csv_error", "msg": str(e)}]
 
-    return TaskListResponse(tasks=tasks, total=total, skip=skip, limit=limit)
+async def import_batch(db: AsyncSession, owner_id: int, rows: list) -> None:
+    # Core executemany INSERT on the table (no RETURNING, no ORM bulk-insert bookkeeping)
+    await db.execute(insert(Task.__table__), rows)
+    await adjust_task_count(db, owner_id, len(rows))
+    await bump_task_list_version(db, owner_id)
+    await db.commit()
+
+async def run_import(owner_id: int, records, chunk_size: int, result: ImportResult):
+    # validates and writes the records batch by batch, updating result; yields after every committed batch.
+    # Opens its own session: with ?progress=true it runs while the response is already streaming.
+    batch, batch_end = [], 0
+
+    def fail(line_number: int, errors: list) -> None:
+        result.failed += 1
+        if len(result.errors) < IMPORT_MAX_ERRORS:
+            result.errors.append(ImportLineError(line=line_number, errors=errors))
+
+    async def commit() -> bool:
+        try:
+            await import_batch(db, owner_id, batch)
+        except SQLAlchemyError as e:
+            # earlier batches stay committed; report how far the import got instead of a bare 500
+            await db.rollback()
+            result.error = f"Database error in batch {result.batches + 1} ({type(e).__name__}), import stopped after line {result.line}"
+            return False
+        result.imported += len(batch)
+        result.batches += 1
+        result.line = batch_end
+        return True
+
+    async with SessionLocal() as db:
+        async for line_number, header, record, errors in records:
+            try:
+                if errors is not None:
+                    fail(line_number, errors)
+                    continue
+                if header is None:
+                    item = TaskCreate.model_validate_json(record)
+                elif len(record) != len(header):
+                    fail(line_number, [{"type": "csv_columns", "msg": f"Expected {len(header)} values, got {len(record)}"}])
+                    continue
+                else:
+                    item = TaskCreate.model_validate({name: value for name, value in zip(header, record) if value != ""})
+            except ValidationError as e:
+                fail(line_number, e.errors(include_url=False, include_context=False))
+                continue
+            batch.append({**item.model_dump(), "owner_id": owner_id})
+            batch_end = line_number
+            if len(batch) >= chunk_size:
+                if not await commit():
+                    return
+                batch = []
+                yield
+        if batch and await commit():
+            yield
+
+class ImportProgressResponse(StreamingResponse):
+    # the body iterator reads the request body itself, so the response must not listen on receive()
+    # for a disconnect the way StreamingResponse does on older ASGI servers (it would swallow body chunks)
+    async def __call__(self, scope, receive, send):
+        await self.stream_response(send)
+
+@app.post("/tasks/import", response_model=ImportResult, summary="Import tasks from a streamed NDJSON or CSV body")
+async def import_tasks(
+    request: Request,
+    import_format: Literal["ndjson", "csv"] = Query("ndjson", alias="format"),
+    chunk_size: int = Query(IMPORT_CHUNK_SIZE, ge=1, le=10000),
+    progress: bool = False,
+    current_user: CurrentUser = Depends(get_current_user),
+):
+    # progress=true answers with NDJSON: one ImportProgress line per committed batch, then the ImportResult
+    result = ImportResult(imported=0, failed=0, batches=0, line=0, errors=[])
+    if import_format == "csv":
+        records = iter_csv_records(request)
+    else:
+        records = (
+            (line_number, None, line, None if line is not None else [{"type": "line_too_long", "msg": f"Line longer than {IMPORT_MAX_RECORD_BYTES} bytes"}])
+            async for line_number, line in iter_ndjson_lines(request, max_line_bytes=IMPORT_MAX_RECORD_BYTES)
+        )
+    batches = run_import(current_user.id, records, chunk_size, result)
+
+    if progress:
+        async def body():
+            async for _ in batches:
+                yield to_json(result, include=set(ImportProgress.model_fields)) + b"\n"
+            yield to_json(result) + b"\n"
+        # no-transform: keeps CompressionMiddleware from buffering the progress lines
+        return ImportProgressResponse(body(), media_type=EXPORT_MEDIA_TYPES["ndjson"], headers={"Cache-Control": "no-transform"})
+
+    async for _ in batches:
+        pass
+    return json_response(result, status_code=status.HTTP_500_INTERNAL_SERVER_ERROR if result.error else status.HTTP_200_OK)
+
+####################################################################
+# Delta sync
+#   GET /tasks/changes?since=<datetime>   first call after a full download (GET /tasks/export)
+#   GET /tasks/changes?cursor=<next_cursor>  every call after that
+# Changes are one feed ordered by time: task rows by (updated_at, id) through
+# ix_tasks_owner_updated_id, and tombstones by (deleted_at, task_id). A delete sorts before an
+# upsert at the same instant, so a page never shows a delete that happened after an upsert it
+# also contains, even when SQLite reuses a deleted id.
+# The cursor is the (timestamp, kind, id) of the last change returned.
+# Changes newer than CHANGES_SETTLE_SECONDS are held back until the next poll. A transaction
+# stamps updated_at before it commits, so the newest rows may not be visible yet.
+# Tombstones are kept for TOMBSTONE_RETENTION_DAYS. A client whose position is older than that
+# gets 410 Gone and has to download everything again.
+####################################################################
+CHANGES_MAX_LIMIT = 1000
+CHANGES_SETTLE_SECONDS = float(os.getenv("CHANGES_SETTLE_SECONDS", "2"))
+TOMBSTONE_RETENTION_DAYS = float(os.getenv("TOMBSTONE_RETENTION_DAYS", "30"))
+TOMBSTONE_COMPACT_INTERVAL_SECONDS = float(os.getenv("TOMBSTONE_COMPACT_INTERVAL_SECONDS", "3600"))
+CHANGE_DELETE, CHANGE_UPSERT = 0, 1  # sort order of the two kinds at the same timestamp
+
+async def add_tombstones(db: AsyncSession, owner_id: int, task_ids: List[int]) -> None:
+    # runs inside the caller's delete transaction
+    if task_ids:
+        deleted_at = datetime.utcnow()
+        await db.execute(insert(TaskTombstone.__table__), [{"task_id": task_id, "owner_id": owner_id, "deleted_at": deleted_at} for task_id in task_ids])
+
+def tombstone_horizon() -> datetime:
+    return datetime.utcnow() - timedelta(days=TOMBSTONE_RETENTION_DAYS)
+
+async def compact_tombstones() -> int:
+    async with SessionLocal() as db:
+        result = await db.execute(delete(TaskTombstone).where(TaskTombstone.deleted_at < tombstone_horizon()).execution_options(synchronize_session=False))
+        await db.commit()
+        return result.rowcount
+
+class TombstoneCompactor:
+    # background loop started with the app; every worker runs one, the DELETE is idempotent
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        if self.interval > 0:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await compact_tombstones()
+            except Exception:
+                pass  # e.g. database briefly locked, retry on the next round
+            await asyncio.sleep(self.interval)
+
+tombstone_compactor = TombstoneCompactor(TOMBSTONE_COMPACT_INTERVAL_SECONDS)
+
+def encode_changes_cursor(at: datetime, kind: int, item_id: int) -> str:
+    raw = json.dumps([at.isoformat(), kind, item_id]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_changes_cursor(cursor: str) -> tuple:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        at, kind, item_id = json.loads(raw)
+        return datetime.fromisoformat(at), int(kind), int(item_id)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+
+@app.get("/tasks/changes", response_model=TaskChangesResponse, summary="Tasks created, updated or deleted since a point in time")
+async def get_task_changes(
+    since: Optional[datetime] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(500, ge=1, le=CHANGES_MAX_LIMIT),
+    db: AsyncSession = Depends(get_db),
+    current_user: CurrentUser = Depends(get_current_user),
+):
+    if cursor:
+        at, kind, item_id = decode_changes_cursor(cursor)
+    elif since is not None:
+        # stored timestamps are naive UTC
+        at, kind, item_id = since.astimezone(timezone.utc).replace(tzinfo=None) if since.tzinfo else since, CHANGE_DELETE, 0
+    else:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Pass since or cursor")
+    if at < tombstone_horizon():
+        raise HTTPException(status_code=status.HTTP_410_GONE, detail="Changes are only kept for the tombstone retention window, download all tasks again")
+    until = datetime.utcnow() - timedelta(seconds=CHANGES_SETTLE_SECONDS)
+
+    # everything after the cursor position in (timestamp, kind, id) order and before `until`
+    task_position = tuple_(Task.updated_at, Task.id) > (at, item_id) if kind == CHANGE_UPSERT else Task.updated_at >= at
+    tombstone_position = TaskTombstone.deleted_at > at if kind == CHANGE_UPSERT else tuple_(TaskTombstone.deleted_at, TaskTombstone.task_id) > (at, item_id)
+    tasks = (await db.scalars(
+        select(Task).where(Task.owner_id == current_user.id, task_position, Task.updated_at < until)
+        .order_by(Task.updated_at, Task.id).limit(limit + 1)
+    )).all()
+    tombstones = (await db.execute(
+        select(TaskTombstone.deleted_at, TaskTombstone.task_id)
+        .where(TaskTombstone.owner_id == current_user.id, tombstone_position, TaskTombstone.deleted_at < until)
+        .order_by(TaskTombstone.deleted_at, TaskTombstone.task_id).limit(limit + 1)
+    )).all()
+
+    changes = sorted(
+        [(task.updated_at, CHANGE_UPSERT, task.id, task) for task in tasks]
+        + [(deleted_at, CHANGE_DELETE, task_id, None) for deleted_at, task_id in tombstones],
+        key=lambda change: change[:3],
+    )
+    has_more = len(changes) > limit
+    changes = changes[:limit]
+    if has_more:
+        next_cursor = encode_changes_cursor(*changes[-1][:3])
+    elif until > at:
+        # nothing else before `until`, so the next poll can start there
+        next_cursor = encode_changes_cursor(until, CHANGE_DELETE, 0)
+    else:
+        next_cursor = encode_changes_cursor(at, kind, item_id)
+    return json_response(TaskChangesResponse(
+        updated=[TaskResponse.model_validate(task) for _, change_kind, _, task in changes if change_kind == CHANGE_UPSERT],
+        deleted=[task_id for _, change_kind, task_id, _ in changes if change_kind == CHANGE_DELETE],
+        next_cursor=next_cursor,
+        has_more=has_more,
+    ))
 
 #get task by id
+# conditional requests (If-None-Match / If-Modified-Since) first read only updated_at and answer 304 when unchanged
 @app.get("/tasks/{task_id}", response_model=TaskResponse, summary="Get a task by ID")
-def get_task(task_id: int, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
-    task= db.query(Task).filter(Task.id == task_id, Task.owner_id == current_user.id).first()
+async def get_task(task_id: int, request: Request, db: AsyncSession = Depends(get_db), current_user: CurrentUser = Depends(get_current_user)):
+    owned = (Task.id == task_id, Task.owner_id == current_user.id)
+    if "if-none-match" in request.headers or "if-modified-since" in request.headers:
+        updated_at = await db.scalar(select(Task.updated_at).where(*owned))
+        if updated_at is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Task not found")
+        if is_not_modified(request, task_etag(task_id, updated_at), updated_at):
+            return not_modified_response(task_etag(task_id, updated_at), updated_at)
+    task= await db.scalar(select(Task).where(*owned))
     if not task:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Task not found")
-    return task
+    response = json_response(TaskResponse.model_validate(task))
+    response.headers.update(validator_headers(task_etag(task.id, task.updated_at), task.updated_at))
+    return response
+
+####################################################################
+# Single-statement write paths
+# The ownership check and the change happen in one UPDATE/DELETE ... WHERE id=? AND owner_id=? RETURNING,
+# and TaskResponse is built straight from the returned row (no SELECT before, no refresh after).
+# A missing row means "not found or not yours" -> 404, same as before.
+####################################################################
+TASK_COLUMNS = tuple(Task.__table__.c)
+
+async def update_owned_task(db: AsyncSession, task_id: int, owner_id: int, values: dict) -> TaskResponse:
+    if values:
+        stmt = update(Task).where(Task.id == task_id, Task.owner_id == owner_id).values(**values).returning(*TASK_COLUMNS)
+    else:
+        stmt = select(*TASK_COLUMNS).where(Task.id == task_id, Task.owner_id == owner_id)
+    row = (await db.execute(stmt.execution_options(synchronize_session=False))).first()
+    if row is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Task not found")
+    if values:
+        await bump_task_list_version(db, owner_id)
+    await db.commit()
+    return TaskResponse.model_validate(row)
 
 #update a task
 @app.post("/tasks/{task_id}", response_model=TaskResponse, summary="Update a task by ID")
-def update_task(task_id: int, task_update: TaskUpdate, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
-    task= db.query(Task).filter(Task.id ==task_id, Task.owner_id == current_user.id).first()
-    if not task:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Task not found") 
+async def update_task(task_id: int, task_update: TaskUpdate, db: AsyncSession = Depends(get_db), current_user: CurrentUser = Depends(get_current_user)):
     update_data= task_update.model_dump(exclude_none=True)
-    for key, value in update_data.items():
-        setattr(task, key, value)
-    db.add(task)
-    db.commit()
-    db.refresh(task)
-    return task
+    return json_response(await update_owned_task(db, task_id, current_user.id, update_data))
+
 #complete atask endpoint
 @app.post("/tasks/{task_id}/complete", response_model=TaskResponse, summary="Mark a task as completed")
-def complete_task(task_id: int, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
-    task= db.query(Task).filter(Task.id == task_id, Task.owner_id == current_user.id).first()
-    if not task:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Task not found")
-    task.is_completed = True
-    task.status = TaskStatus.COMPLETED
-    db.add(task)
-    db.commit()
-    db.refresh(task)
-    return task
+async def complete_task(task_id: int, db: AsyncSession = Depends(get_db), current_user: CurrentUser = Depends(get_current_user)):
+    return json_response(await update_owned_task(db, task_id, current_user.id, {"is_completed": True, "status": TaskStatus.COMPLETED}))
 
 #delete a task
 @app.delete("/tasks/{task_id}", status_code=status.HTTP_204_NO_CONTENT, summary="Delete a task by ID")
-def delete_task(task_id : int, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
-    task= db.query(Task).filter(Task.id == task_id, Task.owner_id == current_user.id).first()
-    if not task:
+async def delete_task(task_id : int, db: AsyncSession = Depends(get_db), current_user: CurrentUser = Depends(get_current_user)):
+    deleted_id = await db.scalar(
+        delete(Task).where(Task.id == task_id, Task.owner_id == current_user.id).returning(Task.id).execution_options(synchronize_session=False)
+    )
+    if deleted_id is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Task not found")
-    db.delete(task)
-    db.commit()
+    await add_tombstones(db, current_user.id, [deleted_id])
+    await adjust_task_count(db, current_user.id, -1)
+    await bump_task_list_version(db, current_user.id)
+    await db.commit()
     return None
 
+# development server with auto-reload; production runs through serve.py (todo-serve)
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True)
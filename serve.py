@@ -0,0 +1,108 @@
+####################################################################
+# Production entry point
+# `python main.py` starts a single dev process with auto-reload. This launcher runs the app
+# the way it should run in production:
+#   - N uvicorn worker processes (default: one per CPU), each with its own event loop and DB pool
+#   - uvloop + httptools when installed (pip install .[server]), asyncio + h11 otherwise
+#   - listen backlog, keep-alive, concurrency limit and graceful-shutdown timeout as flags / env vars
+#   - set METRICS_DIR so GET /metrics aggregates all workers (see Metrics in main.py)
+#
+#   todo-serve --workers 4 --port 8000          (console script from pyproject.toml)
+#   python serve.py --workers 4 --port 8000
+# Every flag can also be set through the environment variable shown in its help text.
+####################################################################
+import argparse
+import asyncio
+import importlib.util
+import os
+
+import uvicorn
+
+
+def env_int(name: str, default: int):
+    value = os.getenv(name)
+    return int(value) if value not in (None, "") else default
+
+
+def best_loop() -> str:
+    return "uvloop" if importlib.util.find_spec("uvloop") else "asyncio"
+
+
+def best_http() -> str:
+    return "httptools" if importlib.util.find_spec("httptools") else "h11"
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Run the task API with production settings")
+    parser.add_argument("--host", default=os.getenv("HOST", "0.0.0.0"), help="HOST")
+    parser.add_argument("--port", type=int, default=env_int("PORT", 8000), help="PORT")
+    parser.add_argument("--workers", type=int, default=env_int("WEB_CONCURRENCY", os.cpu_count() or 1), help="WEB_CONCURRENCY, default: CPU count")
+    parser.add_argument("--loop", choices=["uvloop", "asyncio"], default=os.getenv("SERVER_LOOP") or best_loop(), help="SERVER_LOOP")
+    parser.add_argument("--http", choices=["httptools", "h11"], default=os.getenv("SERVER_HTTP") or best_http(), help="SERVER_HTTP")
+    # pending connections the kernel queues per socket before refusing new ones (also capped by net.core.somaxconn)
+    parser.add_argument("--backlog", type=int, default=env_int("SERVER_BACKLOG", 2048), help="SERVER_BACKLOG")
+    # keep idle connections open longer than the load balancer's idle timeout, so the LB never reuses a socket we just closed
+    parser.add_argument("--keep-alive", type=int, default=env_int("SERVER_KEEP_ALIVE", 75), help="SERVER_KEEP_ALIVE seconds")
+    # per worker: above this many open connections/tasks new requests get 503 instead of queueing without bound
+    parser.add_argument("--limit-concurrency", type=int, default=env_int("SERVER_LIMIT_CONCURRENCY", None), help="SERVER_LIMIT_CONCURRENCY")
+    parser.add_argument("--limit-max-requests", type=int, default=env_int("SERVER_LIMIT_MAX_REQUESTS", None), help="SERVER_LIMIT_MAX_REQUESTS, recycle a worker after this many requests")
+    # on SIGTERM: stop accepting, let in-flight requests finish for up to this long, then close
+    parser.add_argument("--graceful-timeout", type=int, default=env_int("SERVER_GRACEFUL_TIMEOUT", 30), help="SERVER_GRACEFUL_TIMEOUT seconds")
+    parser.add_argument("--proxy-headers", action=argparse.BooleanOptionalAction, default=os.getenv("SERVER_PROXY_HEADERS", "true").lower() == "true", help="SERVER_PROXY_HEADERS")
+    parser.add_argument("--forwarded-allow-ips", default=os.getenv("FORWARDED_ALLOW_IPS", "127.0.0.1"), help="FORWARDED_ALLOW_IPS")
+    parser.add_argument("--access-log", action=argparse.BooleanOptionalAction, default=os.getenv("SERVER_ACCESS_LOG", "false").lower() == "true", help="SERVER_ACCESS_LOG")
+    parser.add_argument("--log-level", default=os.getenv("SERVER_LOG_LEVEL", "info"), help="SERVER_LOG_LEVEL")
+    return parser.parse_args(argv)
+
+
+def prepare_database() -> None:
+    # create tables once in the supervisor: N workers racing through create_all on a fresh
+    # database can both see a table missing and the second CREATE then fails
+    import main
+
+    async def create():
+        async with main.engine.begin() as conn:
+            await conn.run_sync(main.create_schema)
+        await main.engine.dispose()
+
+    asyncio.run(create())
+
+
+def reset_metrics_dir() -> None:
+    # worker snapshots from a previous run would otherwise be summed into the new counters
+    metrics_dir = os.getenv("METRICS_DIR")
+    if metrics_dir and os.path.isdir(metrics_dir):
+        for filename in os.listdir(metrics_dir):
+            if filename.startswith("metrics-") and filename.endswith((".json", ".tmp")):
+                os.remove(os.path.join(metrics_dir, filename))
+
+
+def main(argv=None) -> None:
+    args = parse_args(argv)
+    workers = max(1, args.workers)
+    # every worker starts its own password-hashing pool; split the CPUs between them instead of
+    # starting cpu_count hashing processes per worker (an explicit PASSWORD_HASH_WORKERS wins)
+    os.environ.setdefault("PASSWORD_HASH_WORKERS", str(max(1, (os.cpu_count() or 1) // workers)))
+    reset_metrics_dir()
+    prepare_database()
+    uvicorn.run(
+        "main:app",
+        host=args.host,
+        port=args.port,
+        workers=workers,
+        loop=args.loop,
+        http=args.http,
+        backlog=args.backlog,
+        timeout_keep_alive=args.keep_alive,
+        limit_concurrency=args.limit_concurrency,
+        limit_max_requests=args.limit_max_requests,
+        timeout_graceful_shutdown=args.graceful_timeout,
+        proxy_headers=args.proxy_headers,
+        forwarded_allow_ips=args.forwarded_allow_ips,
+        access_log=args.access_log,
+        log_level=args.log_level,
+    )
+
+
+if __name__ == "__main__":
+    main()